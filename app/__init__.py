@@ -5,15 +5,21 @@ from importlib import import_module
 from flask_cors import CORS
 import logging
 from settings import Config
+from app.services.result_codec import SERIALIZER_NAME, register_result_codec
+from app.services.scanners.registry import scanner_registry
 from typing import Any
 
 
 def make_celery(app: Flask) -> Celery:
+    if app.config.get("CELERY_RESULT_SERIALIZER") == SERIALIZER_NAME:
+        register_result_codec(int(app.config.get("RESULT_COMPRESSION_LEVEL") or 3))
+
     celery = Celery(
         app.import_name,
         backend=app.config["CELERY_RESULT_BACKEND"],
         broker=app.config["CELERY_BROKER_URL"],
-        include=["app.views.scanner.tasks"]
+        # The watchdog is only loaded by workers, never by the web process.
+        include=["app.views.scanner.tasks", "app.services.scanners.watchdog"]
     )
     celery.conf.update(app.config)
 
@@ -27,7 +33,7 @@ def make_celery(app: Flask) -> Celery:
 
 
 def register_blueprints(flask_app: Flask) -> None:
-    for module_name in ("scanner",):
+    for module_name in ("scanner", "metrics"):
         module = import_module("app.views.{}.routes".format(module_name))
         flask_app.register_blueprint(module.blueprint)
 
@@ -49,6 +55,8 @@ def create_app(config: Config) -> Flask:
     flask_app.config["SCANNER_SETTINGS"] = scanner_settings_directory
     logging.info(f"Scanner settings directory set to: {scanner_settings_directory}")
 
+    scanner_registry.register_from_spec(flask_app.config.get("SCANNER_PLUGINS"))
+
     celery = make_celery(flask_app)
 
     flask_app.extensions["celery"] = celery
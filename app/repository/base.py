@@ -5,6 +5,10 @@ class BaseRepository:
     def create(self, data: Dict[str, Any]) -> None:
         raise NotImplementedError
 
+    def create_many(self, records: List[Dict[str, Any]]) -> None:
+        for record in records:
+            self.create(record)
+
     def read(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
         raise NotImplementedError
 
@@ -0,0 +1,39 @@
+import os
+from typing import Dict, Optional, Tuple
+
+from flask import current_app
+
+from .base import BaseRepository
+from .json import JSONRepository
+from .jsonl import JSONLRepository
+from .sqlite import SQLiteRepository
+
+_repository_types = {
+    "json": JSONRepository,
+    "jsonl": JSONLRepository,
+    "sqlite": SQLiteRepository,
+}
+
+_repositories: Dict[Tuple[int, str], BaseRepository] = {}
+
+
+def get_repository(storage_type: Optional[str] = None) -> Optional[BaseRepository]:
+    """
+    Return the repository selected by ``STORAGE_TYPE``, one instance per process so
+    in-memory indexes survive between tasks.
+
+    :return: Repository, or None if no storage is configured.
+    """
+    storage_type = (storage_type or current_app.config.get("STORAGE_TYPE") or "").lower()
+    if not storage_type:
+        return None
+
+    try:
+        repository_class = _repository_types[storage_type]
+    except KeyError:
+        raise Exception(f"Unknown STORAGE_TYPE=[{storage_type}]!")
+
+    key = (os.getpid(), storage_type)
+    if key not in _repositories:
+        _repositories[key] = repository_class()
+    return _repositories[key]
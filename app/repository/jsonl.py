@@ -0,0 +1,265 @@
+import fcntl
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import IO, Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import uuid4
+
+from flask import current_app
+
+from .base import BaseRepository
+
+logger = logging.getLogger(__name__)
+
+# (op, key, record) of a log entry; deletes carry no record.
+Entry = Tuple[str, str, Optional[Dict[str, Any]]]
+
+
+class JSONLRepository(BaseRepository):
+    """
+    Append-only JSON lines log with an in-memory primary key index.
+
+    Every write appends ``put`` or ``del`` (tombstone) entries under an exclusive
+    file lock, so saving a record costs O(record) and concurrent workers never
+    overwrite each other. The index maps each live key to the offset of its latest
+    entry; it is rebuilt from the log on first use and caught up incrementally when
+    other processes append. Superseded entries are dropped by a background compaction
+    once they make up ``compaction_ratio`` of the log.
+
+    The lock file holds the compaction generation and the number of superseded entries,
+    shared by every process: a process whose generation is behind rebuilds its index,
+    since its offsets point into the log that compaction replaced.
+    """
+
+    def __init__(
+            self,
+            file_name: str = "data.jsonl",
+            primary_key: str = "id",
+            compaction_ratio: float = 0.5,
+            compaction_min_entries: int = 1000,
+    ) -> None:
+        self.directory: str = current_app.config["SCANNER_SETTINGS"]
+        self.primary_key = primary_key
+        self.compaction_ratio = compaction_ratio
+        self.compaction_min_entries = compaction_min_entries
+
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+
+        self._path = os.path.join(self.directory, file_name)
+        self._lock_path = f"{self._path}.lock"
+
+        self._index: Dict[str, int] = {}
+        self._position = 0
+        self._generation = 0
+        self._dead_entries = 0
+        self._lock_file: Optional[IO[str]] = None
+
+        self._thread_lock = threading.RLock()
+        self._compaction: Optional[threading.Thread] = None
+
+    def create(self, data: Dict[str, Any]) -> None:
+        self.create_many([data])
+
+    def create_many(self, records: List[Dict[str, Any]]) -> None:
+        entries: List[Entry] = []
+        for record in records:
+            if record.get(self.primary_key) in (None, ""):
+                record = {**record, self.primary_key: uuid4().hex}
+            entries.append(("put", str(record[self.primary_key]), record))
+        self._append(entries)
+
+    def read(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        with self._locked(exclusive=False):
+            return [record for _, record in self._find(query)]
+
+    def update(self, query: Dict[str, Any], data: Dict[str, Any]) -> None:
+        with self._locked(exclusive=True):
+            entries = [("put", key, {**record, **data}) for key, record in self._find(query)]
+            self._write(entries)
+        self._maybe_compact()
+
+    def delete(self, query: Dict[str, Any]) -> None:
+        with self._locked(exclusive=True):
+            entries = [("del", key, None) for key, _ in self._find(query)]
+            self._write(entries)
+        self._maybe_compact()
+
+    def compact(self) -> None:
+        """
+        Rewrite the log with only the latest entry of every live key.
+        """
+        with self._locked(exclusive=True):
+            tmp_path = f"{self._path}.compact"
+            index: Dict[str, int] = {}
+            with open(self._path, "rb") as source, open(tmp_path, "wb") as target:
+                for key, offset in sorted(self._index.items(), key=lambda item: item[1]):
+                    source.seek(offset)
+                    index[key] = target.tell()
+                    target.write(source.readline())
+                target.flush()
+                os.fsync(target.fileno())
+            os.replace(tmp_path, self._path)
+
+            self._index = index
+            self._position = os.path.getsize(self._path)
+            self._generation += 1
+            self._dead_entries = 0
+            self._write_header()
+        logger.info(f"Compacted {self._path} to {len(index)} records")
+
+    @contextmanager
+    def _locked(self, exclusive: bool) -> Iterator[None]:
+        with self._thread_lock:
+            with open(self._lock_path, "a+") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                self._lock_file = lock_file
+                try:
+                    self._refresh()
+                    yield
+                finally:
+                    self._lock_file = None
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _refresh(self) -> None:
+        """
+        Bring the index up to date with entries appended or compacted by other processes.
+        """
+        header = self._read_header()
+        generation = int(header.get("generation", 0))
+        try:
+            size = os.path.getsize(self._path)
+        except FileNotFoundError:
+            self._index, self._position, self._generation, self._dead_entries = {}, 0, generation, 0
+            return
+
+        if generation != self._generation or size < self._position:
+            self._index, self._position, self._dead_entries = {}, 0, 0
+            self._generation = generation
+        if size > self._position:
+            self._replay()
+        if "dead" in header:
+            # Counted by every writer; a log written before the header existed keeps
+            # the count of its replay until the next write records it.
+            self._dead_entries = int(header["dead"])
+
+    def _read_header(self) -> Dict[str, Any]:
+        lock_file = self._held_lock_file()
+        lock_file.seek(0)
+        content = lock_file.read()
+        try:
+            return dict(json.loads(content)) if content else {}
+        except (ValueError, TypeError):
+            logger.warning(f"Ignoring corrupt header in {self._lock_path}")
+            return {}
+
+    def _write_header(self) -> None:
+        lock_file = self._held_lock_file()
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(json.dumps({"generation": self._generation, "dead": self._dead_entries}))
+        lock_file.flush()
+
+    def _held_lock_file(self) -> IO[str]:
+        if self._lock_file is None:
+            raise RuntimeError(f"{self._lock_path} is not locked")
+        return self._lock_file
+
+    def _replay(self) -> None:
+        with open(self._path, "rb") as f:
+            f.seek(self._position)
+            offset = self._position
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Partially written entry of a crashed writer; the next write truncates it.
+                    break
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping corrupt entry at offset {offset} of {self._path}")
+                    self._dead_entries += 1
+                else:
+                    self._apply(entry["op"], entry["key"], offset)
+                offset += len(line)
+            self._position = offset
+
+    def _apply(self, op: str, key: str, offset: int) -> None:
+        if key in self._index:
+            self._dead_entries += 1
+        if op == "put":
+            self._index[key] = offset
+        else:
+            self._index.pop(key, None)
+            self._dead_entries += 1
+
+    def _append(self, entries: Sequence[Entry]) -> None:
+        with self._locked(exclusive=True):
+            self._write(entries)
+        self._maybe_compact()
+
+    def _write(self, entries: Sequence[Entry]) -> None:
+        if not entries:
+            return
+
+        lines = []
+        for op, key, record in entries:
+            entry: Dict[str, Any] = {"op": op, "key": key}
+            if record is not None:
+                entry["value"] = record
+            lines.append(json.dumps(entry).encode("utf-8") + b"\n")
+
+        with open(self._path, "ab") as f:
+            # Anything past the replayed position is a partial entry left by a crashed
+            # writer; appending after it would glue the new entry onto it.
+            if os.fstat(f.fileno()).st_size > self._position:
+                logger.warning(f"Truncating a partial entry at offset {self._position} of {self._path}")
+                f.truncate(self._position)
+            offset = self._position
+            f.write(b"".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+
+        for (op, key, _), line in zip(entries, lines):
+            self._apply(op, key, offset)
+            offset += len(line)
+        self._position = offset
+        self._write_header()
+
+    def _find(self, query: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        if self.primary_key in query:
+            key = str(query[self.primary_key])
+            offsets = [self._index[key]] if key in self._index else []
+        else:
+            offsets = sorted(self._index.values())
+
+        matches: List[Tuple[str, Dict[str, Any]]] = []
+        if not offsets:
+            return matches
+        with open(self._path, "rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                entry = json.loads(f.readline())
+                record = entry["value"]
+                if all(record.get(k) == v for k, v in query.items()):
+                    matches.append((entry["key"], record))
+        return matches
+
+    def _maybe_compact(self) -> None:
+        total = len(self._index) + self._dead_entries
+        if self._dead_entries < self.compaction_min_entries:
+            return
+        if self._dead_entries / total < self.compaction_ratio:
+            return
+        if self._compaction is not None and self._compaction.is_alive():
+            return
+
+        self._compaction = threading.Thread(target=self._compact_in_background, daemon=True)
+        self._compaction.start()
+
+    def _compact_in_background(self) -> None:
+        try:
+            self.compact()
+        except Exception as err:
+            logger.exception(f"Compaction of {self._path} failed: {err}")
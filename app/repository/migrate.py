@@ -0,0 +1,62 @@
+"""
+One-shot migration of the records saved by JSONRepository into SQLite.
+
+Usage: python -m app.repository.migrate [--batch-size N]
+"""
+import argparse
+import json
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+from .sqlite import SQLiteRepository
+
+logger = logging.getLogger(__name__)
+
+
+def migrate_json_to_sqlite(directory: Path, repository: SQLiteRepository, batch_size: int = 1000) -> int:
+    """
+    Copy the records of every JSON list file in ``directory``. Scanner settings files
+    (JSON objects) are left alone.
+
+    :return: Number of records migrated.
+    """
+    migrated = 0
+    for file_path in sorted(directory.glob("*.json")):
+        try:
+            with open(file_path, "r") as f:
+                data = json.load(f)
+        except json.JSONDecodeError as err:
+            logger.warning(f"Skipping {file_path}: {err}")
+            continue
+
+        if not isinstance(data, list):
+            continue
+
+        records = [record for record in data if isinstance(record, dict)]
+        for start in range(0, len(records), batch_size):
+            repository.create_many(records[start:start + batch_size])
+        migrated += len(records)
+        logger.info(f"Migrated {len(records)} records from {file_path}")
+
+    return migrated
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    from run import flask_app
+
+    with flask_app.app_context():
+        repository = SQLiteRepository()
+        migrated = migrate_json_to_sqlite(
+            Path(flask_app.config["SCANNER_SETTINGS"]), repository, args.batch_size
+        )
+    print(f"Migrated {migrated} records into {repository.path}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,152 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import uuid4
+
+from flask import current_app
+
+from .base import BaseRepository
+
+_KEY_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
+
+class SQLiteRepository(BaseRepository):
+    """
+    Records stored as JSON documents in a SQLite table running in WAL mode, so
+    Celery workers can read while another one writes.
+
+    Query keys may be dotted paths into the document (``address.country``); the keys
+    listed in ``SQLITE_INDEXES`` get an expression index.
+    """
+
+    def __init__(self, path: Optional[str] = None, indexes: Optional[List[str]] = None) -> None:
+        config = current_app.config
+        self.path: str = path or config.get("SQLITE_PATH") or os.path.join(
+            config["SCANNER_SETTINGS"], "data.sqlite3"
+        )
+        if indexes is None:
+            indexes = [
+                key.strip()
+                for key in (config.get("SQLITE_INDEXES") or "account,address.country").split(",")
+                if key.strip()
+            ]
+        self.indexes = indexes
+
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._local = threading.local()
+        self._create_schema()
+
+    def create(self, data: Dict[str, Any]) -> None:
+        self.create_many([data])
+
+    def create_many(self, records: List[Dict[str, Any]]) -> None:
+        rows = []
+        for record in records:
+            if record.get("id") in (None, ""):
+                record = {**record, "id": uuid4().hex}
+            rows.append((str(record["id"]), json.dumps(record)))
+
+        connection = self._connection()
+        with _transaction(connection):
+            connection.executemany(
+                "INSERT INTO records (id, data) VALUES (?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET data = excluded.data",
+                rows,
+            )
+
+    def read(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        where, params = self._where(query)
+        rows = self._connection().execute(f"SELECT data FROM records{where}", params)
+        return [json.loads(data) for (data,) in rows]
+
+    def update(self, query: Dict[str, Any], data: Dict[str, Any]) -> None:
+        where, params = self._where(query)
+        connection = self._connection()
+        with _transaction(connection):
+            rows = connection.execute(f"SELECT id, data FROM records{where}", params).fetchall()
+            connection.executemany(
+                "UPDATE records SET data = ? WHERE id = ?",
+                [(json.dumps({**json.loads(row_data), **data}), row_id) for row_id, row_data in rows],
+            )
+
+    def delete(self, query: Dict[str, Any]) -> None:
+        where, params = self._where(query)
+        connection = self._connection()
+        with _transaction(connection):
+            connection.execute(f"DELETE FROM records{where}", params)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None or getattr(self._local, "pid", None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA busy_timeout=30000")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _create_schema(self) -> None:
+        connection = self._connection()
+        with _transaction(connection):
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS records (id TEXT PRIMARY KEY, data TEXT NOT NULL)"
+            )
+            for key in self.indexes:
+                if key == "id":
+                    continue
+                index_name = "idx_records_" + _validate_key(key).replace(".", "_")
+                connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS {index_name} ON records ({_json_expression(key)})"
+                )
+
+    @staticmethod
+    def _where(query: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        clauses = []
+        params: List[Any] = []
+        for key, value in query.items():
+            column = "id" if key == "id" else _json_expression(key)
+            if value is None:
+                clauses.append(f"{column} IS NULL")
+                continue
+            if isinstance(value, (dict, list)):
+                value = json.dumps(value)
+            clauses.append(f"{column} = ?")
+            params.append(str(value) if key == "id" else value)
+
+        if not clauses:
+            return "", params
+        return " WHERE " + " AND ".join(clauses), params
+
+
+@contextmanager
+def _transaction(connection: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """
+    ``BEGIN IMMEDIATE`` ... ``COMMIT`` so a batch of writes is one transaction and
+    takes the write lock up front instead of failing on upgrade.
+    """
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        yield connection
+    except Exception:
+        connection.execute("ROLLBACK")
+        raise
+    connection.execute("COMMIT")
+
+
+def _validate_key(key: str) -> str:
+    if not _KEY_PATTERN.match(key):
+        raise ValueError(f"Invalid query key=[{key}]!")
+    return key
+
+
+def _json_expression(key: str) -> str:
+    # Inlined rather than bound so queries match the expression indexes.
+    return f"json_extract(data, '$.{_validate_key(key)}')"
@@ -0,0 +1,166 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import redis
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+# Entries each process believes every cache directory holds; the directory is only
+# listed again once the estimate passes the limit plus some slack.
+_entry_counts: Dict[str, int] = {}
+_entry_counts_lock = threading.Lock()
+
+
+class FileCache:
+    """
+    JSON-on-disk key/value cache shared by every worker that mounts ``directory``.
+
+    Entries expire after ``ttl`` seconds and the oldest entries are evicted once
+    more than ``max_entries`` are stored. The directory is not listed on every write:
+    each process counts the entries it adds, so the cache may briefly hold up to
+    ``eviction_slack`` more entries per process before being trimmed.
+    """
+
+    def __init__(
+            self,
+            directory: str,
+            ttl: float,
+            max_entries: int = 1000,
+            eviction_slack: Optional[int] = None,
+    ) -> None:
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.eviction_slack = max(1, max_entries // 10) if eviction_slack is None else eviction_slack
+
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+
+    def get(self, key: str) -> Optional[Any]:
+        file_path = self._path(key)
+        try:
+            with open(file_path, "r") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as err:
+            logger.warning(f"Dropping unreadable cache entry {file_path}: {err}")
+            self._remove(file_path)
+            return None
+
+        if entry.get("expires_at", 0) <= time.time():
+            self._remove(file_path)
+            return None
+        return entry.get("value")
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        entry = {
+            "expires_at": time.time() + (self.ttl if ttl is None else ttl),
+            "value": value,
+        }
+        file_path = self._path(key)
+        is_new = not os.path.exists(file_path)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, file_path)
+        except Exception:
+            self._remove(tmp_path)
+            raise
+
+        if is_new and self._count(1) > self.max_entries + self.eviction_slack:
+            self._evict()
+
+    def delete(self, key: str) -> None:
+        self._remove(self._path(key))
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def _count(self, added: int) -> int:
+        with _entry_counts_lock:
+            count = _entry_counts.get(self.directory)
+            if count is None:
+                count = sum(1 for name in os.listdir(self.directory) if name.endswith(".json"))
+            else:
+                count = max(0, count + added)
+            _entry_counts[self.directory] = count
+            return count
+
+    def _evict(self) -> None:
+        entries = []
+        now = time.time()
+        for file_name in os.listdir(self.directory):
+            if not file_name.endswith(".json"):
+                continue
+            file_path = os.path.join(self.directory, file_name)
+            try:
+                entries.append((os.path.getmtime(file_path), file_path))
+            except FileNotFoundError:
+                continue
+
+        remaining = len(entries)
+        if remaining > self.max_entries:
+            entries.sort()
+            overflow = len(entries) - self.max_entries
+            for mtime, file_path in entries:
+                if overflow <= 0 and mtime + self.ttl > now:
+                    break
+                self._remove(file_path)
+                overflow -= 1
+                remaining -= 1
+
+        with _entry_counts_lock:
+            _entry_counts[self.directory] = remaining
+
+    @staticmethod
+    def _remove(file_path: str) -> None:
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+
+
+class RedisCache:
+    """
+    Key/value cache with the interface of ``FileCache``, on Redis, for entries that
+    workers on other hosts must see. Redis expires the entries.
+    """
+
+    def __init__(self, client: redis.Redis, ttl: float, prefix: str = "cache") -> None:
+        self._client = client
+        self.ttl = ttl
+        self._prefix = f"{prefix}:"
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self._client.get(self._prefix + key)
+        if raw is None:
+            return None
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError as err:
+            logger.warning(f"Dropping unreadable cache entry {key}: {err}")
+            self.delete(key)
+            return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_in = max(1, int(self.ttl if ttl is None else ttl))
+        self._client.set(self._prefix + key, json.dumps(value), ex=expires_in)
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self._prefix + key)
+
+
+def get_cache_directory(name: str) -> str:
+    base_directory = current_app.config.get("CACHE_DIRECTORY") or os.path.join(
+        tempfile.gettempdir(), "argyle_scanning"
+    )
+    return os.path.join(base_directory, name)
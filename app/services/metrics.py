@@ -0,0 +1,174 @@
+import glob
+import os
+import socket
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional, Tuple, cast
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    values,
+)
+
+_MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+# The multiprocess helpers of prometheus_client are not annotated.
+_multiprocess_value = cast(Callable[[Callable[[], str]], Any], values.MultiProcessValue)
+_multiprocess_collector = cast(Callable[[CollectorRegistry], Any], multiprocess.MultiProcessCollector)
+_mark_process_dead = cast(Callable[[str], None], multiprocess.mark_process_dead)
+
+
+def _process_identifier(pid: Optional[int] = None) -> str:
+    # The API and the workers run in different containers sharing the metrics directory,
+    # so process ids alone could collide.
+    return f"{socket.gethostname()}-{os.getpid() if pid is None else pid}"
+
+
+if _MULTIPROCESS:
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+    values.ValueClass = _multiprocess_value(_process_identifier)
+
+# Scans spend seconds to minutes in a stage, far above the default buckets.
+_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, float("inf"))
+
+STAGE_DURATION = Histogram(
+    "scanner_stage_duration_seconds",
+    "Duration of each stage of a scan",
+    ["scanner", "stage", "outcome"],
+    buckets=_BUCKETS,
+)
+TASK_DURATION = Histogram(
+    "scanner_task_duration_seconds",
+    "Duration of a scanner task run, from start to success, retry or failure",
+    ["scanner", "outcome"],
+    buckets=_BUCKETS,
+)
+QUEUE_WAIT = Histogram(
+    "scanner_task_queue_wait_seconds",
+    "Time a scanner task waited in the broker before a worker started it",
+    ["scanner", "queue"],
+    buckets=_BUCKETS,
+)
+SESSION_START = Histogram(
+    "webdriver_session_start_seconds",
+    "Time to start a Remote WebDriver session on the Selenium grid",
+    ["outcome"],
+    buckets=_BUCKETS,
+)
+ADMISSION_WAIT = Histogram(
+    "grid_admission_wait_seconds",
+    "Time spent waiting for a free Selenium grid slot, by outcome (admitted, timeout, rejected)",
+    ["outcome"],
+    buckets=_BUCKETS,
+)
+TASK_RETRIES = Counter(
+    "scanner_task_retries_total",
+    "Scanner task runs that failed and were retried",
+    ["scanner"],
+)
+SESSIONS_REAPED = Counter(
+    "webdriver_sessions_reaped_total",
+    "WebDriver sessions closed for their owner: leaked by a finished task or orphaned by a dead worker",
+    ["reason"],
+)
+DRIVER_FAILURES = Counter(
+    "scanner_driver_failures_total",
+    "WebDriver sessions that could not be started or broke during a scan",
+    ["scanner", "reason"],
+)
+
+
+@contextmanager
+def stage(scanner: str, name: str) -> Iterator[None]:
+    """
+    Time a block as one stage of a scan, labelled ``success`` or ``error``.
+    """
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "success"
+    finally:
+        STAGE_DURATION.labels(scanner=scanner, stage=name, outcome=outcome).observe(
+            time.perf_counter() - started
+        )
+
+
+def observe_task(scanner: str, outcome: str, seconds: float) -> None:
+    TASK_DURATION.labels(scanner=scanner, outcome=outcome).observe(seconds)
+    if outcome == "retry":
+        TASK_RETRIES.labels(scanner=scanner).inc()
+
+
+def observe_queue_wait(
+        scanner: str, enqueued_at: Optional[float], eta: Optional[float] = None, queue: str = "default"
+) -> None:
+    """
+    :param enqueued_at: Epoch time the task message was published.
+    :param eta: Epoch time a delayed task (e.g. a retry countdown) became due.
+    :param queue: Queue the task was routed to.
+    """
+    if enqueued_at is None:
+        return
+    ready_at = max(enqueued_at, eta or 0.0)
+    QUEUE_WAIT.labels(scanner=scanner, queue=queue).observe(max(0.0, time.time() - ready_at))
+
+
+def observe_session_start(outcome: str, seconds: float) -> None:
+    SESSION_START.labels(outcome=outcome).observe(seconds)
+
+
+def observe_admission_wait(outcome: str, seconds: float) -> None:
+    ADMISSION_WAIT.labels(outcome=outcome).observe(seconds)
+
+
+def record_driver_failure(scanner: str, reason: str) -> None:
+    DRIVER_FAILURES.labels(scanner=scanner, reason=reason).inc()
+
+
+def record_sessions_reaped(reason: str, count: int = 1) -> None:
+    SESSIONS_REAPED.labels(reason=reason).inc(count)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Metrics in the Prometheus text format, aggregated over every process writing to
+    ``PROMETHEUS_MULTIPROC_DIR`` when it is set.
+
+    :return: Payload and content type.
+    """
+    if _MULTIPROCESS:
+        registry = CollectorRegistry()
+        _multiprocess_collector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def clear_process_metrics() -> None:
+    """
+    Remove the metric files left in ``PROMETHEUS_MULTIPROC_DIR`` by earlier runs on this
+    host, before the API or a worker starts its processes. Files of the other containers
+    sharing the directory are kept.
+    """
+    if not _MULTIPROCESS:
+        return
+    pattern = os.path.join(os.environ["PROMETHEUS_MULTIPROC_DIR"], f"*_{socket.gethostname()}-*.db")
+    for file_path in glob.glob(pattern):
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+
+
+def mark_process_dead(pid: int) -> None:
+    """
+    Drop the live gauges of a gunicorn or Celery child process that exited.
+    """
+    if _MULTIPROCESS:
+        _mark_process_dead(_process_identifier(pid))
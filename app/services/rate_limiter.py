@@ -0,0 +1,245 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple, cast
+
+import redis
+from flask import current_app
+
+from app.services.cache import get_cache_directory
+from app.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# State of a bucket: available tokens (negative when callers have reserved future ones),
+# last update time, the fraction of the configured rate currently allowed, and the end
+# of the current throttling penalty.
+BucketState = Dict[str, float]
+BucketUpdate = Callable[[Optional[BucketState]], Tuple[BucketState, float]]
+
+
+class RateLimitExceeded(Exception):
+    """
+    A token would only be due after ``wait`` seconds, longer than the caller may block.
+    """
+
+    def __init__(self, message: str, wait: float) -> None:
+        super().__init__(message)
+        self.wait = wait
+
+    def __reduce__(self) -> Any:
+        return self.__class__, (str(self), self.wait)
+
+
+class RedisBucketStore:
+    """
+    Bucket states in Redis hashes, updated with optimistic WATCH/MULTI transactions.
+    """
+
+    def __init__(self, client: redis.Redis, ttl: int = 3600) -> None:
+        self._client = client
+        self._ttl = ttl
+
+    def update(self, key: str, update: BucketUpdate) -> float:
+        with self._client.pipeline() as pipe:
+            while True:
+                try:
+                    # Pipeline.watch is not annotated; replies are decoded to str.
+                    cast(Any, pipe).watch(key)
+                    raw = cast(Dict[str, str], pipe.hgetall(key))
+                    state, result = update({k: float(v) for k, v in raw.items()} if raw else None)
+                    pipe.multi()
+                    pipe.hset(key, mapping={k: v for k, v in state.items()})
+                    pipe.expire(key, self._ttl)
+                    pipe.execute()
+                    return result
+                except redis.WatchError:
+                    continue
+
+
+class SQLiteBucketStore:
+    """
+    Bucket states in a SQLite file, for deployments whose workers share a host but not
+    a Redis server.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        connection = self._connect()
+        try:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL, updated REAL, factor REAL, penalized_until REAL DEFAULT 0)"
+            )
+            columns = [row[1] for row in connection.execute("PRAGMA table_info(buckets)")]
+            if "penalized_until" not in columns:
+                connection.execute("ALTER TABLE buckets ADD COLUMN penalized_until REAL DEFAULT 0")
+        finally:
+            connection.close()
+
+    def update(self, key: str, update: BucketUpdate) -> float:
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT tokens, updated, factor, penalized_until FROM buckets WHERE key = ?", (key,)
+            ).fetchone()
+            state, result = update(
+                dict(zip(("tokens", "updated", "factor", "penalized_until"), row)) if row else None
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated, factor, penalized_until) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, state["tokens"], state["updated"], state["factor"], state["penalized_until"]),
+            )
+            connection.execute("COMMIT")
+            return result
+        except Exception:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self._path, timeout=30, isolation_level=None)
+
+
+class TokenBucketLimiter:
+    """
+    Token buckets shared by every worker, one per target host and endpoint class.
+
+    Callers reserve a token and sleep until it is due, so concurrent workers are spread
+    evenly over time instead of bursting. When the target throttles (429 or a challenge
+    page), the bucket's rate is halved and it pauses for ``retry_after`` seconds; the rate
+    then recovers linearly over ``recovery`` seconds. Throttled responses to requests
+    that were already in flight during that pause do not slow the bucket down again.
+
+    :param limits: ``{endpoint: (requests per second, burst)}``, with a ``default`` entry.
+    :param max_wait: Longest wait for a token before giving up.
+    """
+
+    def __init__(
+            self,
+            store: Any,
+            limits: Dict[str, Tuple[float, float]],
+            max_wait: float = 60.0,
+            min_factor: float = 0.1,
+            recovery: float = 300.0,
+    ) -> None:
+        self._store = store
+        self._limits = limits
+        self._max_wait = max_wait
+        self._min_factor = min_factor
+        self._recovery = recovery
+
+    def acquire(self, host: str, endpoint: str) -> float:
+        """
+        Wait for a token of the host's endpoint class.
+
+        :return: Seconds waited.
+        :raises RateLimitExceeded: If the wait would exceed ``max_wait``.
+        """
+        rate, burst = self._limit(endpoint)
+
+        def take(state: Optional[BucketState]) -> Tuple[BucketState, float]:
+            state = self._refill(state, rate, burst)
+            wait = max(0.0, (1 - state["tokens"]) / (rate * state["factor"]))
+            if wait <= self._max_wait:
+                state["tokens"] -= 1
+            return state, wait
+
+        wait = self._store.update(self._key(host, endpoint), take)
+        if wait > self._max_wait:
+            raise RateLimitExceeded(
+                f"Rate limit of {host} [{endpoint}] would delay the request by {wait:.0f}s", wait
+            )
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def penalize(self, host: str, endpoint: str, retry_after: Optional[float] = None) -> None:
+        """
+        Slow the bucket down after the target throttled a request.
+        """
+        rate, burst = self._limit(endpoint)
+
+        def slow_down(state: Optional[BucketState]) -> Tuple[BucketState, float]:
+            state = self._refill(state, rate, burst)
+            if state["penalized_until"] > state["updated"]:
+                return state, 0.0
+            state["factor"] = max(self._min_factor, state["factor"] / 2)
+            state["tokens"] = min(state["tokens"], 0.0) - (retry_after or 0.0) * rate * state["factor"]
+            # At least until the next token is due at the lowered rate.
+            window = max(retry_after or 0.0, 1 / (rate * state["factor"]))
+            state["penalized_until"] = state["updated"] + window
+            return state, 1.0
+
+        if self._store.update(self._key(host, endpoint), slow_down):
+            logger.warning(f"{host} [{endpoint}] is throttling requests, slowing down")
+
+    def _refill(self, state: Optional[BucketState], rate: float, burst: float) -> BucketState:
+        now = time.time()
+        if state is None:
+            return {"tokens": burst, "updated": now, "factor": 1.0, "penalized_until": 0.0}
+
+        elapsed = max(0.0, now - state["updated"])
+        factor = min(1.0, state["factor"] + elapsed / self._recovery)
+        tokens = min(burst, state["tokens"] + elapsed * rate * factor)
+        penalized_until = state.get("penalized_until") or 0.0
+        return {"tokens": tokens, "updated": now, "factor": factor, "penalized_until": penalized_until}
+
+    def _limit(self, endpoint: str) -> Tuple[float, float]:
+        return self._limits.get(endpoint) or self._limits["default"]
+
+    @staticmethod
+    def _key(host: str, endpoint: str) -> str:
+        return f"ratelimit:{host}:{endpoint}"
+
+
+def parse_limits(value: str) -> Dict[str, Tuple[float, float]]:
+    """
+    Parse ``RATE_LIMITS``, e.g. ``login=0.2:1,default=5:10`` (requests per second:burst).
+    """
+    limits: Dict[str, Tuple[float, float]] = {"default": (5.0, 10.0)}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        endpoint, _, limit = item.partition("=")
+        rate, _, burst = limit.partition(":")
+        limits[endpoint.strip()] = (float(rate), float(burst or rate))
+    return limits
+
+
+_limiters: Dict[int, TokenBucketLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter() -> Optional[TokenBucketLimiter]:
+    """
+    Return the rate limiter of the current process, on Redis when the broker is Redis
+    and on a SQLite file in the cache directory otherwise.
+
+    :return: Rate limiter, or None if ``RATE_LIMIT_ENABLED`` is off.
+    """
+    config = current_app.config
+    if not config.get("RATE_LIMIT_ENABLED"):
+        return None
+
+    pid = os.getpid()
+    with _limiters_lock:
+        if pid not in _limiters:
+            backend = (config.get("RATE_LIMIT_BACKEND") or "auto").lower()
+            redis_url = config.get("REDIS_URL") or config.get("CELERY_BROKER_URL") or ""
+            if backend == "redis" or (backend == "auto" and redis_url.startswith(("redis://", "rediss://"))):
+                store: Any = RedisBucketStore(get_redis())
+            else:
+                directory = get_cache_directory("rate_limits")
+                os.makedirs(directory, mode=0o700, exist_ok=True)
+                store = SQLiteBucketStore(os.path.join(directory, "buckets.sqlite3"))
+            _limiters[pid] = TokenBucketLimiter(
+                store,
+                parse_limits(config.get("RATE_LIMITS") or ""),
+                max_wait=float(config.get("RATE_LIMIT_MAX_WAIT") or 60),
+            )
+        return _limiters[pid]
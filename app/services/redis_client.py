@@ -0,0 +1,24 @@
+import os
+import threading
+from typing import Dict
+
+import redis
+from flask import current_app
+
+_clients: Dict[int, redis.Redis] = {}
+_clients_lock = threading.Lock()
+
+
+def get_redis() -> redis.Redis:
+    """
+    Redis client of the current process for state shared by every API and worker
+    process, on ``REDIS_URL`` (the Celery broker by default).
+    """
+    pid = os.getpid()
+    with _clients_lock:
+        if pid not in _clients:
+            url = current_app.config.get("REDIS_URL") or current_app.config.get("CELERY_BROKER_URL")
+            if not url or not url.startswith(("redis://", "rediss://", "unix://")):
+                raise Exception("REDIS_URL must point to a Redis server")
+            _clients[pid] = redis.Redis.from_url(url, decode_responses=True)
+        return _clients[pid]
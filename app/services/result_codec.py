@@ -0,0 +1,78 @@
+import datetime
+import decimal
+import uuid
+from typing import Any
+
+from kombu.serialization import register
+
+SERIALIZER_NAME = "msgpack-zstd"
+CONTENT_TYPE = "application/x-msgpack-zstd"
+
+# Frame: magic, schema version, then the zstd-compressed msgpack payload. Bump the
+# version when the payload layout changes; results of unknown versions are rejected
+# instead of being misread.
+_MAGIC = b"AS"
+SCHEMA_VERSION = 1
+
+
+class ResultCodecError(Exception):
+    pass
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Cannot encode {type(value).__name__} in a task result")
+
+
+class ResultCodec:
+    """
+    msgpack + zstd encoding of task results, several times smaller than JSON for
+    scanned profiles. Dates, decimals and UUIDs are stored as strings.
+    """
+
+    def __init__(self, level: int = 3) -> None:
+        try:
+            import msgpack
+            import zstandard
+        except ImportError as err:
+            raise ResultCodecError(
+                f"The {SERIALIZER_NAME} result serializer needs the msgpack and zstandard packages: {err}"
+            )
+        self._msgpack = msgpack
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def encode(self, value: Any) -> bytes:
+        payload = self._msgpack.packb(value, default=_default, use_bin_type=True)
+        return _MAGIC + bytes([SCHEMA_VERSION]) + self._compressor.compress(payload)
+
+    def decode(self, data: Any) -> Any:
+        if isinstance(data, str):
+            data = data.encode("latin-1")
+        if data[:len(_MAGIC)] != _MAGIC:
+            raise ResultCodecError("Not a msgpack-zstd task result")
+        version = data[len(_MAGIC)]
+        if version != SCHEMA_VERSION:
+            raise ResultCodecError(f"Unsupported task result schema version {version}")
+        payload = self._decompressor.decompress(data[len(_MAGIC) + 1:])
+        return self._msgpack.unpackb(payload, raw=False)
+
+
+def register_result_codec(level: int = 3) -> None:
+    """
+    Register the ``msgpack-zstd`` serializer with kombu, to be used as
+    ``CELERY_RESULT_SERIALIZER``.
+    """
+    codec = ResultCodec(level)
+    register(
+        SERIALIZER_NAME,
+        codec.encode,
+        codec.decode,
+        content_type=CONTENT_TYPE,
+        content_encoding="binary",
+    )
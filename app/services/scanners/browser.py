@@ -1,23 +1,139 @@
+from typing import Any, Dict, Optional, Union
+
 from selenium import webdriver
 from flask import current_app
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.firefox.options import Options
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.firefox.options import Options as FirefoxOptions
+
+PAGE_LOAD_STRATEGIES = ("normal", "eager", "none")
+
+# Firefox preferences that stop images and web fonts from being downloaded and media from playing.
+_FIREFOX_BLOCKING_PREFS: Dict[str, Any] = {
+    "permissions.default.image": 2,
+    "media.autoplay.default": 5,
+    "media.mediasource.enabled": False,
+    "media.hardware-video-decoding.enabled": False,
+    "gfx.downloadable_fonts.enabled": False,
+    "browser.display.use_document_fonts": 0,
+}
+
+# Firefox preferences that keep the memory of a session small.
+_FIREFOX_MEMORY_PREFS: Dict[str, Any] = {
+    "browser.cache.disk.enable": False,
+    "browser.cache.memory.capacity": 16384,
+    "browser.sessionhistory.max_total_viewers": 0,
+    "browser.sessionstore.resume_from_crash": False,
+    "dom.ipc.processCount": 1,
+    "fission.autostart": False,
+}
+
+# Chrome preferences that stop images from being downloaded; web fonts are disabled by
+# --disable-remote-fonts. Chrome has no switch to block media, it is only kept from
+# autoplaying.
+_CHROME_BLOCKING_PREFS: Dict[str, Any] = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.managed_default_content_settings.media_stream": 2,
+    "profile.managed_default_content_settings.plugins": 2,
+}
+
+
+class BrowserProfile:
+    """
+    Options of the browser sessions started on the grid.
+
+    Scans only need cookies and in-page fetches, so by default sessions run headless,
+    ``driver.get`` returns once the DOM is ready (``eager``), images and web fonts
+    are never downloaded and media never autoplays (Firefox also disables media
+    streaming).
+
+    :param browser: ``firefox`` or ``chrome``, matching the grid nodes.
+    :param page_load_strategy: ``normal``, ``eager`` or ``none``.
+    :param block_resources: Skip images and web fonts, and media playback.
+    :param script_timeout: Seconds an async script may run.
+    """
 
+    def __init__(
+            self,
+            browser: str = "firefox",
+            headless: bool = True,
+            page_load_strategy: str = "eager",
+            block_resources: bool = True,
+            script_timeout: int = 60,
+            page_load_timeout: Optional[int] = None,
+    ) -> None:
+        browser = browser.lower()
+        if browser not in ("firefox", "chrome"):
+            raise Exception(f"Unsupported browser {browser}, use firefox or chrome")
+        if page_load_strategy not in PAGE_LOAD_STRATEGIES:
+            raise Exception(f"Unsupported page load strategy {page_load_strategy}")
 
-def get_remote_webdriver() -> webdriver.Remote:
+        self.browser = browser
+        self.headless = headless
+        self.page_load_strategy = page_load_strategy
+        self.block_resources = block_resources
+        self.script_timeout = script_timeout
+        self.page_load_timeout = page_load_timeout
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "BrowserProfile":
+        return cls(
+            browser=config.get("BROWSER") or "firefox",
+            headless=bool(config.get("BROWSER_HEADLESS", True)),
+            page_load_strategy=config.get("BROWSER_PAGE_LOAD_STRATEGY") or "eager",
+            block_resources=bool(config.get("BROWSER_BLOCK_RESOURCES", True)),
+            script_timeout=int(config.get("BROWSER_SCRIPT_TIMEOUT") or 60),
+            page_load_timeout=int(config.get("BROWSER_PAGE_LOAD_TIMEOUT") or 0) or None,
+        )
+
+    def options(self) -> Union[FirefoxOptions, ChromeOptions]:
+        options = self._firefox_options() if self.browser == "firefox" else self._chrome_options()
+        options.page_load_strategy = self.page_load_strategy
+        # Batched in-page fetches run as async scripts and must be allowed to outlive their own timeouts.
+        timeouts = {"script": self.script_timeout * 1000}
+        if self.page_load_timeout:
+            timeouts["pageLoad"] = self.page_load_timeout * 1000
+        options.timeouts = timeouts
+        return options
+
+    def _firefox_options(self) -> FirefoxOptions:
+        options = FirefoxOptions()
+        if self.headless:
+            options.add_argument("-headless")
+        for name, value in _FIREFOX_MEMORY_PREFS.items():
+            options.set_preference(name, value)
+        if self.block_resources:
+            for name, value in _FIREFOX_BLOCKING_PREFS.items():
+                options.set_preference(name, value)
+        return options
+
+    def _chrome_options(self) -> ChromeOptions:
+        options = ChromeOptions()
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--disable-gpu")
+        if self.headless:
+            options.add_argument("--headless=new")
+        if self.block_resources:
+            options.add_argument("--blink-settings=imagesEnabled=false")
+            options.add_argument("--disable-remote-fonts")
+            options.add_argument("--autoplay-policy=user-gesture-required")
+            options.add_argument("--mute-audio")
+            options.add_experimental_option("prefs", _CHROME_BLOCKING_PREFS)
+        return options
+
+
+def get_remote_webdriver(profile: Optional[BrowserProfile] = None) -> webdriver.Remote:
     # Initialize the WebDriver
-    options = Options()
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
+    if profile is None:
+        profile = BrowserProfile.from_config(current_app.config)
+    options = profile.options()
 
     # Set the URL of the Selenium Hub
     selenium_hub_url = current_app.config.get("SELENIUM_HUB_URL", "http://selenium-hub:4444")
     if not selenium_hub_url:
         raise Exception("SELENIUM_HUB_URL is not set in the configuration")
 
-    if options is None:
-        raise Exception("Failed to initialize Chrome options")
-
     try:
         capabilities = options.to_capabilities()
         print(f"Using capabilities: {capabilities}")
@@ -0,0 +1,63 @@
+from typing import Any, Dict, Union
+
+from flask import current_app
+
+from app.services.cache import FileCache, RedisCache, get_cache_directory
+from app.services.redis_client import get_redis
+
+
+class ScanCheckpoint:
+    """
+    Intermediate results of one scan (tokens, login cookies, ciphertext, raw details),
+    kept for a short time so a retried task resumes after its last completed stage.
+    """
+
+    def __init__(self, cache: Union[FileCache, RedisCache], scanner_name: str, key: str) -> None:
+        self._cache = cache
+        self._key = f"checkpoint:{scanner_name}:{key}"
+
+    def load(self) -> Dict[str, Any]:
+        return self._cache.get(self._key) or {}
+
+    def save(self, **stages: Any) -> None:
+        """
+        Merge completed stages into the checkpoint, e.g. ``save(ciphertext="~01...")``.
+        """
+        self._cache.set(self._key, {**self.load(), **stages})
+
+    def discard(self, *stages: str) -> None:
+        """
+        Drop stages whose data turned out to be stale, or the whole checkpoint.
+        """
+        if not stages:
+            self._cache.delete(self._key)
+            return
+        checkpoint = self.load()
+        for stage in stages:
+            checkpoint.pop(stage, None)
+        self._cache.set(self._key, checkpoint)
+
+
+def get_scan_checkpoint(scanner_name: str, key: str) -> ScanCheckpoint:
+    """
+    Checkpoints live in Redis when the broker is Redis, since a retry may run on a worker
+    of another host, and in ``CACHE_DIRECTORY`` otherwise, which must then be a volume
+    shared by every worker.
+
+    :param key: Id of the task running the scan, stable across its retries.
+    """
+    config = current_app.config
+    ttl = float(config.get("CHECKPOINT_TTL") or 900)
+    backend = (config.get("CHECKPOINT_BACKEND") or "auto").lower()
+    redis_url = config.get("REDIS_URL") or config.get("CELERY_BROKER_URL") or ""
+
+    cache: Union[FileCache, RedisCache]
+    if backend == "redis" or (backend == "auto" and redis_url.startswith(("redis://", "rediss://"))):
+        cache = RedisCache(get_redis(), ttl)
+    else:
+        cache = FileCache(
+            directory=get_cache_directory("checkpoints"),
+            ttl=ttl,
+            max_entries=int(config.get("CHECKPOINT_MAX_ENTRIES") or 10000),
+        )
+    return ScanCheckpoint(cache, scanner_name, key)
@@ -0,0 +1,368 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from flask import current_app
+from selenium import webdriver
+
+from app.services.metrics import observe_session_start
+from .browser import get_remote_webdriver
+from .grid_scheduler import GridAdmissionError, GridScheduler, get_grid_scheduler
+from .session_registry import SessionRegistry, current_task_id, get_session_registry
+
+logger = logging.getLogger(__name__)
+
+
+class DriverPoolTimeout(Exception):
+    pass
+
+
+class _PooledDriver:
+    def __init__(self, driver: webdriver.Remote, lease: Optional[str] = None) -> None:
+        self.driver = driver
+        self.lease = lease
+        self.created_at = time.monotonic()
+        self.uses = 0
+        self.task_id: Optional[str] = None
+
+
+class DriverPool:
+    """
+    Per-process pool of warm Remote WebDriver sessions.
+
+    Sessions are reset between checkouts and recycled once they reach
+    ``max_uses`` checkouts or ``max_age`` seconds. With an ``admission`` scheduler,
+    a session is only started once the grid has a free slot for it. With a ``registry``,
+    every session and the task using it are recorded so sessions left behind by a dead
+    worker can be reaped.
+    """
+
+    def __init__(
+            self,
+            factory: Callable[[], webdriver.Remote] = get_remote_webdriver,
+            max_size: int = 2,
+            max_uses: int = 50,
+            max_age: float = 1800.0,
+            acquire_timeout: float = 120.0,
+            admission: Optional[GridScheduler] = None,
+            registry: Optional[SessionRegistry] = None,
+    ) -> None:
+        self._factory = factory
+        self._admission = admission
+        self._registry = registry
+        self._max_size = max_size
+        self._max_uses = max_uses
+        self._max_age = max_age
+        self._acquire_timeout = acquire_timeout
+
+        self._idle: List[_PooledDriver] = []
+        self._in_use: Dict[int, _PooledDriver] = {}
+        self._condition = threading.Condition()
+
+        self._created = 0
+        self._recycled = 0
+        self._discarded = 0
+        self._checkouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def acquire(self, tenant: Optional[str] = None) -> webdriver.Remote:
+        """
+        Check out a healthy session, creating one if the pool is not full.
+
+        :param tenant: Grid queue to wait in if a new session has to be started.
+        :return: WebDriver ready to be used by a single scan.
+        """
+        started = time.monotonic()
+        deadline = started + self._acquire_timeout
+
+        with self._condition:
+            while True:
+                while self._idle:
+                    pooled = self._idle.pop()
+                    if self._is_expired(pooled) or not self._renew(pooled) or not self._is_healthy(pooled):
+                        self._close(pooled, recycled=True)
+                        continue
+                    return self._checkout(pooled, started)
+
+                if self._size() < self._max_size:
+                    # Reserve the slot before releasing the lock for the slow handshake.
+                    self._created += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise DriverPoolTimeout(
+                        f"No WebDriver session available after {self._acquire_timeout}s"
+                    )
+                self._condition.wait(remaining)
+
+        lease: Optional[str] = None
+        session_started = 0.0
+        try:
+            if self._admission is not None:
+                lease = self._admission.admit(tenant or "default", max(0.0, deadline - time.monotonic()))
+            session_started = time.monotonic()
+            pooled = _PooledDriver(self._factory(), lease)
+            self._track(pooled)
+        except Exception as err:
+            if session_started:
+                observe_session_start("error", time.monotonic() - session_started)
+            if self._admission is not None and lease is not None:
+                self._admission.release(lease)
+            with self._condition:
+                self._created -= 1
+                self._condition.notify()
+            if isinstance(err, GridAdmissionError):
+                raise DriverPoolTimeout(str(err)) from err
+            raise
+        observe_session_start("success", time.monotonic() - session_started)
+
+        with self._condition:
+            return self._checkout(pooled, started)
+
+    def release(self, driver: webdriver.Remote, discard: bool = False) -> None:
+        """
+        Return a session to the pool, resetting it for the next account.
+
+        :param driver: WebDriver previously returned by ``acquire``.
+        :param discard: Quit the session instead of returning it to the pool.
+        """
+        with self._condition:
+            pooled = self._in_use.pop(id(driver), None)
+
+        if pooled is None:
+            logger.warning("Released a WebDriver that does not belong to the pool")
+            return
+
+        if discard or self._is_expired(pooled) or not self._reset(pooled):
+            self._close(pooled, recycled=not discard)
+            with self._condition:
+                self._condition.notify()
+            return
+
+        self._assign(pooled, None)
+        with self._condition:
+            self._idle.append(pooled)
+            self._condition.notify()
+
+    def reclaim(self, task_id: str) -> int:
+        """
+        Close the sessions a finished task never released, e.g. because an exception
+        escaped before the scan returned its driver.
+
+        :return: Number of sessions closed.
+        """
+        with self._condition:
+            leaked = [pooled for pooled in self._in_use.values() if pooled.task_id == task_id]
+            for pooled in leaked:
+                del self._in_use[id(pooled.driver)]
+
+        for pooled in leaked:
+            logger.warning(f"Task {task_id} did not release its WebDriver session, closing it")
+            self._close(pooled, recycled=False)
+        if leaked:
+            with self._condition:
+                self._condition.notify_all()
+        return len(leaked)
+
+    @contextmanager
+    def session(self) -> Iterator[webdriver.Remote]:
+        driver = self.acquire()
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self) -> None:
+        with self._condition:
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            self._close(pooled, recycled=False)
+
+    def open_sessions(self) -> int:
+        """
+        Sessions this process holds on the hub: the registered ones, including those it
+        failed to close, or the sessions of the pool without a registry.
+        """
+        if self._registry is not None:
+            try:
+                return self._registry.owned_count()
+            except Exception as err:
+                logger.warning(f"Failed to count the registered WebDriver sessions: {err}")
+        with self._condition:
+            return self._size()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "size": self._size(),
+                "max_size": self._max_size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "created": self._created,
+                "recycled": self._recycled,
+                "discarded": self._discarded,
+                "checkouts": self._checkouts,
+                "wait_seconds_total": round(self._wait_total, 3),
+                "wait_seconds_max": round(self._wait_max, 3),
+                "wait_seconds_avg": round(self._wait_total / self._checkouts, 3)
+                if self._checkouts else 0.0,
+            }
+
+    def _size(self) -> int:
+        return self._created - self._recycled - self._discarded
+
+    def _checkout(self, pooled: _PooledDriver, started: float) -> webdriver.Remote:
+        waited = time.monotonic() - started
+        pooled.uses += 1
+        self._assign(pooled, current_task_id())
+        self._in_use[id(pooled.driver)] = pooled
+        self._checkouts += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        return pooled.driver
+
+    def _track(self, pooled: _PooledDriver) -> None:
+        session_id = getattr(pooled.driver, "session_id", None)
+        if self._registry is None or not session_id:
+            return
+        try:
+            self._registry.register(session_id, pooled.lease)
+        except Exception as err:
+            logger.warning(f"Failed to register WebDriver session {session_id}: {err}")
+
+    def _assign(self, pooled: _PooledDriver, task_id: Optional[str]) -> None:
+        pooled.task_id = task_id
+        session_id = getattr(pooled.driver, "session_id", None)
+        if self._registry is None or not session_id:
+            return
+        try:
+            self._registry.assign(session_id, task_id)
+        except Exception as err:
+            logger.warning(f"Failed to update WebDriver session {session_id}: {err}")
+
+    def _is_expired(self, pooled: _PooledDriver) -> bool:
+        return (
+            pooled.uses >= self._max_uses
+            or time.monotonic() - pooled.created_at >= self._max_age
+        )
+
+    def _renew(self, pooled: _PooledDriver) -> bool:
+        """
+        Extend the grid lease of an idle session before reusing it.
+
+        :return: False if the lease expired and the slot may have been given away.
+        """
+        if self._admission is None or pooled.lease is None:
+            return True
+        try:
+            return self._admission.renew(pooled.lease)
+        except Exception as err:
+            logger.warning(f"Failed to renew grid lease, keeping the session: {err}")
+            return True
+
+    @staticmethod
+    def _is_healthy(pooled: _PooledDriver) -> bool:
+        try:
+            pooled.driver.execute_script("return 1;")
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _reset(pooled: _PooledDriver) -> bool:
+        """
+        Clear cookies and web storage so the next account starts clean.
+
+        :return: False if the session is no longer usable.
+        """
+        try:
+            pooled.driver.delete_all_cookies()
+            pooled.driver.execute_script(
+                "try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}"
+            )
+            pooled.driver.get("about:blank")
+            return True
+        except Exception as err:
+            logger.warning(f"Failed to reset pooled WebDriver session: {err}")
+            return False
+
+    def _close(self, pooled: _PooledDriver, recycled: bool) -> None:
+        try:
+            pooled.driver.quit()
+            closed = True
+        except Exception as err:
+            logger.warning(f"Failed to quit WebDriver session: {err}")
+            closed = False
+        if self._admission is not None and pooled.lease is not None:
+            self._admission.release(pooled.lease)
+        session_id = getattr(pooled.driver, "session_id", None)
+        if self._registry is not None and session_id:
+            try:
+                if closed:
+                    self._registry.unregister(session_id)
+                else:
+                    # Left for the reaper to close on the hub.
+                    self._registry.abandon(session_id)
+            except Exception as err:
+                logger.warning(f"Failed to update WebDriver session {session_id}: {err}")
+        with self._condition:
+            if recycled:
+                self._recycled += 1
+            else:
+                self._discarded += 1
+
+
+_pool: Optional[DriverPool] = None
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+
+
+def get_driver_pool() -> DriverPool:
+    """
+    Return the WebDriver pool of the current worker process.
+
+    A forked worker never inherits its parent's sessions; it builds its own pool.
+    """
+    global _pool, _pool_pid
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            config = current_app.config
+            _pool = DriverPool(
+                max_size=int(config.get("DRIVER_POOL_SIZE") or 2),
+                max_uses=int(config.get("DRIVER_POOL_MAX_USES") or 50),
+                max_age=float(config.get("DRIVER_POOL_MAX_AGE") or 1800),
+                acquire_timeout=float(config.get("DRIVER_POOL_ACQUIRE_TIMEOUT") or 120),
+                admission=get_grid_scheduler(),
+                registry=get_session_registry(),
+            )
+            _pool_pid = os.getpid()
+            atexit.register(_pool.close)
+        return _pool
+
+
+def current_driver_pool() -> Optional[DriverPool]:
+    """
+    :return: The pool of the current process if one was started, without starting one.
+    """
+    with _pool_lock:
+        return _pool if _pool_pid == os.getpid() else None
+
+
+def set_driver_pool(pool: DriverPool) -> None:
+    """
+    Replace the pool of the current process, e.g. with one built on a stub WebDriver factory.
+    """
+    global _pool, _pool_pid
+
+    with _pool_lock:
+        if _pool is not None and _pool is not pool:
+            _pool.close()
+        _pool = pool
+        _pool_pid = os.getpid()
@@ -0,0 +1,341 @@
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, cast
+from uuid import uuid4
+
+import redis
+from flask import current_app
+
+from app.services.metrics import observe_admission_wait
+from app.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class GridAdmissionError(Exception):
+    pass
+
+
+class GridQueueFull(GridAdmissionError):
+    pass
+
+
+class GridAdmissionTimeout(GridAdmissionError):
+    pass
+
+
+# Adds a waiting ticket to its tenant's queue, unless the waiting room is full.
+# KEYS: tenants, served, heartbeats, tickets
+# ARGV: queue key prefix, ticket, tenant, now, max queue size
+_ENQUEUE_SCRIPT = """
+if redis.call('ZCARD', KEYS[3]) >= tonumber(ARGV[5]) then
+  return 0
+end
+local served = redis.call('HGET', KEYS[2], ARGV[3]) or 0
+redis.call('ZADD', KEYS[1], 'NX', served, ARGV[3])
+redis.call('ZADD', ARGV[1] .. ARGV[3], ARGV[4], ARGV[2])
+redis.call('ZADD', KEYS[3], ARGV[4], ARGV[2])
+redis.call('HSET', KEYS[4], ARGV[2], ARGV[3])
+return 1
+"""
+
+# Grants a lease to the ticket if a slot is free and the ticket is among the next ones
+# in fair order: tenants take turns, least recently served first, each in arrival order.
+# Expired leases and tickets whose waiter stopped polling are dropped first.
+# KEYS: leases, tenants, served, heartbeats, tickets
+# ARGV: queue key prefix, ticket, now, lease ttl, capacity, stale after
+# Returns 1 when admitted, 0 to keep waiting, -1 if the ticket is unknown.
+_ADMIT_SCRIPT = """
+local prefix, ticket, now = ARGV[1], ARGV[2], tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+
+local stale = redis.call('ZRANGEBYSCORE', KEYS[4], '-inf', now - tonumber(ARGV[6]))
+for _, stale_ticket in ipairs(stale) do
+  local stale_tenant = redis.call('HGET', KEYS[5], stale_ticket)
+  if stale_tenant then
+    redis.call('ZREM', prefix .. stale_tenant, stale_ticket)
+  end
+  redis.call('HDEL', KEYS[5], stale_ticket)
+  redis.call('ZREM', KEYS[4], stale_ticket)
+end
+
+if not redis.call('HGET', KEYS[5], ticket) then
+  return -1
+end
+redis.call('ZADD', KEYS[4], now, ticket)
+
+local free = tonumber(ARGV[5]) - redis.call('ZCARD', KEYS[1])
+if free <= 0 then
+  return 0
+end
+
+local tenants = {}
+for _, tenant in ipairs(redis.call('ZRANGE', KEYS[2], 0, -1)) do
+  if redis.call('ZCARD', prefix .. tenant) > 0 then
+    table.insert(tenants, tenant)
+  else
+    redis.call('ZREM', KEYS[2], tenant)
+  end
+end
+
+local picked, round = 0, 0
+while picked < free do
+  local progressed = false
+  for _, tenant in ipairs(tenants) do
+    local head = redis.call('ZRANGE', prefix .. tenant, round, round)
+    if #head > 0 then
+      progressed = true
+      picked = picked + 1
+      if head[1] == ticket then
+        redis.call('ZREM', prefix .. tenant, ticket)
+        redis.call('HDEL', KEYS[5], ticket)
+        redis.call('ZREM', KEYS[4], ticket)
+        redis.call('ZADD', KEYS[1], now + tonumber(ARGV[4]), ticket)
+        redis.call('HSET', KEYS[3], tenant, now)
+        redis.call('ZADD', KEYS[2], now, tenant)
+        return 1
+      end
+      if picked >= free then
+        break
+      end
+    end
+  end
+  if not progressed then
+    break
+  end
+  round = round + 1
+end
+return 0
+"""
+
+# Extends a lease that has not expired yet.
+# KEYS: leases
+# ARGV: lease, now, lease ttl
+_RENEW_SCRIPT = """
+local expires_at = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if not expires_at or tonumber(expires_at) <= tonumber(ARGV[2]) then
+  redis.call('ZREM', KEYS[1], ARGV[1])
+  return 0
+end
+redis.call('ZADD', KEYS[1], tonumber(ARGV[2]) + tonumber(ARGV[3]), ARGV[1])
+return 1
+"""
+
+
+class GridScheduler:
+    """
+    Admission control for Selenium grid slots, shared by every worker through Redis.
+
+    A browser session may only be started under a lease on a free slot. Callers over
+    capacity wait in a bounded queue where tenants take turns, so one large batch does
+    not starve everybody else. Leases expire after ``lease_ttl`` seconds unless renewed,
+    so slots held by a crashed worker are eventually reclaimed.
+    """
+
+    def __init__(
+            self,
+            client: redis.Redis,
+            capacity: Callable[[], int],
+            lease_ttl: float = 2100.0,
+            max_queue: int = 1000,
+            poll_interval: float = 0.5,
+            stale_after: float = 30.0,
+            prefix: str = "grid",
+    ) -> None:
+        self._client = client
+        self._capacity = capacity
+        self._lease_ttl = lease_ttl
+        self._max_queue = max_queue
+        self._poll_interval = poll_interval
+        self._stale_after = stale_after
+
+        self._leases_key = f"{prefix}:leases"
+        self._tenants_key = f"{prefix}:tenants"
+        self._served_key = f"{prefix}:served"
+        self._heartbeats_key = f"{prefix}:waiting"
+        self._tickets_key = f"{prefix}:tickets"
+        self._queue_prefix = f"{prefix}:queue:"
+
+        self._enqueue_script = client.register_script(_ENQUEUE_SCRIPT)
+        self._admit_script = client.register_script(_ADMIT_SCRIPT)
+        self._renew_script = client.register_script(_RENEW_SCRIPT)
+
+    def admit(self, tenant: str, timeout: float) -> str:
+        """
+        Wait for a free grid slot.
+
+        :param tenant: Queue the caller waits in, e.g. the client that requested the scan.
+        :param timeout: Seconds to wait before giving up.
+        :return: Lease id, to be released when the browser session is closed.
+        """
+        ticket = uuid4().hex
+        started = time.monotonic()
+
+        if not self._enqueue(ticket, tenant):
+            observe_admission_wait("rejected", 0.0)
+            raise GridQueueFull(f"More than {self._max_queue} scans are waiting for a grid slot")
+
+        try:
+            while True:
+                status = self._admit_script(
+                    keys=[
+                        self._leases_key,
+                        self._tenants_key,
+                        self._served_key,
+                        self._heartbeats_key,
+                        self._tickets_key,
+                    ],
+                    args=[
+                        self._queue_prefix,
+                        ticket,
+                        time.time(),
+                        self._lease_ttl,
+                        self._capacity(),
+                        self._stale_after,
+                    ],
+                )
+                if status == 1:
+                    observe_admission_wait("admitted", time.monotonic() - started)
+                    return ticket
+                if status == -1 and not self._enqueue(ticket, tenant):
+                    raise GridQueueFull(f"More than {self._max_queue} scans are waiting for a grid slot")
+
+                if time.monotonic() - started >= timeout:
+                    observe_admission_wait("timeout", time.monotonic() - started)
+                    raise GridAdmissionTimeout(f"No grid slot became free within {timeout:.0f}s")
+                time.sleep(self._poll_interval)
+        except BaseException:
+            self._cancel(ticket, tenant)
+            raise
+
+    def renew(self, lease: str) -> bool:
+        """
+        :return: False if the lease expired, in which case its slot may have been reused.
+        """
+        return self._renew_script(
+            keys=[self._leases_key], args=[lease, time.time(), self._lease_ttl]
+        ) == 1
+
+    def release(self, lease: str) -> None:
+        try:
+            self._client.zrem(self._leases_key, lease)
+        except redis.RedisError as err:
+            logger.warning(f"Failed to release grid lease {lease}, it will expire: {err}")
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        # The client decodes responses, so members come back as str.
+        tenants = cast(List[str], self._client.zrange(self._tenants_key, 0, -1))
+        with self._client.pipeline() as pipe:
+            pipe.zcount(self._leases_key, f"({now}", "+inf")
+            pipe.zcard(self._heartbeats_key)
+            for tenant in tenants:
+                pipe.zcard(self._queue_prefix + tenant)
+                pipe.zrange(self._queue_prefix + tenant, 0, 0, withscores=True)
+            leased, waiting, *queues = pipe.execute()
+
+        oldest = [head[0][1] for head in queues[1::2] if head]
+        return {
+            "capacity": self._capacity(),
+            "leased": leased,
+            "waiting": waiting,
+            "oldest_wait_seconds": round(now - min(oldest), 3) if oldest else 0.0,
+            "waiting_by_tenant": {tenant: count for tenant, count in zip(tenants, queues[0::2]) if count},
+        }
+
+    def _enqueue(self, ticket: str, tenant: str) -> bool:
+        return self._enqueue_script(
+            keys=[self._tenants_key, self._served_key, self._heartbeats_key, self._tickets_key],
+            args=[self._queue_prefix, ticket, tenant, time.time(), self._max_queue],
+        ) == 1
+
+    def _cancel(self, ticket: str, tenant: str) -> None:
+        try:
+            with self._client.pipeline() as pipe:
+                pipe.zrem(self._queue_prefix + tenant, ticket)
+                pipe.zrem(self._heartbeats_key, ticket)
+                pipe.hdel(self._tickets_key, ticket)
+                pipe.execute()
+        except redis.RedisError as err:
+            logger.warning(f"Failed to leave the grid queue, the ticket will go stale: {err}")
+
+
+class GridCapacity:
+    """
+    Number of browser slots on the grid: ``GRID_CAPACITY`` when configured, otherwise
+    the slots the hub reports, refreshed at most every ``refresh_interval`` seconds.
+    """
+
+    def __init__(
+            self,
+            client: redis.Redis,
+            hub_url: Optional[str],
+            configured: int = 0,
+            refresh_interval: float = 30.0,
+            key: str = "grid:capacity",
+    ) -> None:
+        self._client = client
+        self._hub_url = hub_url
+        self._configured = configured
+        self._refresh_interval = refresh_interval
+        self._key = key
+
+    def __call__(self) -> int:
+        if self._configured > 0:
+            return self._configured
+
+        cached = self._client.get(self._key)
+        if cached is not None:
+            return int(cached)
+
+        try:
+            capacity = self._hub_slots()
+        # requests.RequestException is an OSError.
+        except (OSError, ValueError, KeyError) as err:
+            last_known = cast(Optional[str], self._client.get(f"{self._key}:last"))
+            logger.warning(f"Failed to read the grid capacity from the hub, using {last_known or 1}: {err}")
+            return int(last_known or 1)
+
+        with self._client.pipeline() as pipe:
+            pipe.set(self._key, capacity, ex=max(1, int(self._refresh_interval)))
+            pipe.set(f"{self._key}:last", capacity)
+            pipe.execute()
+        return capacity
+
+    def _hub_slots(self) -> int:
+        if not self._hub_url:
+            raise ValueError("SELENIUM_HUB_URL is not set")
+        # Imported here: the web process also builds the scheduler, to report its stats.
+        import requests
+
+        response = requests.get(f"{self._hub_url.rstrip('/')}/status", timeout=5)
+        response.raise_for_status()
+        nodes = response.json()["value"].get("nodes", [])
+        return sum(
+            int(node.get("maxSessions") or len(node.get("slots", [])))
+            for node in nodes
+            if node.get("availability", "UP") == "UP"
+        )
+
+
+def get_grid_scheduler() -> Optional[GridScheduler]:
+    """
+    :return: The grid scheduler, or None if admission control is disabled.
+    """
+    config = current_app.config
+    if not config.get("GRID_ADMISSION_ENABLED"):
+        return None
+
+    client = get_redis()
+    capacity = GridCapacity(
+        client,
+        config.get("SELENIUM_HUB_URL"),
+        configured=int(config.get("GRID_CAPACITY") or 0),
+        refresh_interval=float(config.get("GRID_CAPACITY_REFRESH") or 30),
+    )
+    return GridScheduler(
+        client,
+        capacity,
+        lease_ttl=float(config.get("GRID_LEASE_TTL") or 2100),
+        max_queue=int(config.get("GRID_MAX_QUEUE") or 1000),
+    )
@@ -0,0 +1,71 @@
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+from flask import current_app
+
+from app.services.cache import FileCache, get_cache_directory
+
+
+def fingerprint(payload: Any) -> str:
+    """
+    Stable digest of a raw scanner payload, independent of key order.
+    """
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def unchanged_result(record_id: Optional[str], digest: str) -> Dict[str, Any]:
+    return {"unchanged": True, "id": record_id, "fingerprint": digest}
+
+
+def is_unchanged(result: Any) -> bool:
+    return isinstance(result, dict) and result.get("unchanged") is True
+
+
+def diff_records(old: Dict[str, Any], new: Dict[str, Any], prefix: str = "") -> Dict[str, Dict[str, Any]]:
+    """
+    Field-level differences between two records, nested fields as dotted keys.
+
+    :return: ``{"address.city": {"old": ..., "new": ...}, ...}``
+    """
+    diff: Dict[str, Dict[str, Any]] = {}
+    for key in sorted(set(old) | set(new)):
+        old_value, new_value = old.get(key), new.get(key)
+        if isinstance(old_value, dict) and isinstance(new_value, dict):
+            diff.update(diff_records(old_value, new_value, f"{prefix}{key}."))
+        elif old_value != new_value:
+            diff[f"{prefix}{key}"] = {"old": old_value, "new": new_value}
+    return diff
+
+
+class ScanStateStore:
+    """
+    Fingerprint and ``updatedOn`` of the last payload scanned for each account.
+    """
+
+    def __init__(self, cache: FileCache, scanner_name: str) -> None:
+        self._cache = cache
+        self._scanner_name = scanner_name
+
+    def get(self, account: str) -> Optional[Dict[str, Any]]:
+        return self._cache.get(self._key(account))
+
+    def save(self, account: str, digest: str, updated_on: str, record_id: Optional[str]) -> None:
+        self._cache.set(
+            self._key(account),
+            {"fingerprint": digest, "updated_on": updated_on, "id": record_id},
+        )
+
+    def _key(self, account: str) -> str:
+        return f"scan_state:{self._scanner_name}:{account}"
+
+
+def get_scan_state_store(scanner_name: str) -> ScanStateStore:
+    config = current_app.config
+    cache = FileCache(
+        directory=get_cache_directory("scan_state"),
+        ttl=float(config.get("SCAN_STATE_TTL") or 90 * 86400),
+        max_entries=int(config.get("SCAN_STATE_MAX_ENTRIES") or 100000),
+    )
+    return ScanStateStore(cache, scanner_name)
@@ -0,0 +1,102 @@
+import logging
+import threading
+from importlib import import_module
+from importlib.metadata import entry_points
+from typing import Any, Dict, List, Optional, cast
+
+from app.services.scanners.scanner_creator import ScannerCreator
+
+logger = logging.getLogger(__name__)
+
+# Entry point group through which installed packages add scanners, e.g. in their
+# pyproject.toml: [project.entry-points."argyle_scanning.scanners"] linkedin = "pkg.creator:Creator"
+ENTRY_POINT_GROUP = "argyle_scanning.scanners"
+
+BUILTIN_SCANNERS: Dict[str, str] = {
+    "upwork": "app.services.scanners.upwork.creator:UpworkCreator",
+}
+
+
+class ScannerRegistry:
+    """
+    Scanners declared by name and the ``module:Class`` path of their creator.
+
+    Creators, and the browser and parsing stack they pull in, are only imported when a
+    scanner is first resolved, which happens in the Celery worker; the web process only
+    needs the names.
+    """
+
+    def __init__(self, scanners: Optional[Dict[str, str]] = None) -> None:
+        self._targets: Dict[str, str] = dict(scanners or {})
+        self._creators: Dict[str, ScannerCreator] = {}
+        self._entry_points_loaded = False
+        self._lock = threading.Lock()
+
+    def register(self, name: str, target: str) -> None:
+        """
+        :param target: ``module:Class`` of a ``ScannerCreator`` subclass.
+        """
+        if ":" not in target:
+            raise ValueError(f"Scanner [{name}] must be declared as module:Class, got [{target}]")
+        with self._lock:
+            self._targets[name] = target
+            self._creators.pop(name, None)
+
+    def register_from_spec(self, spec: Optional[str]) -> None:
+        """
+        Register the scanners of ``SCANNER_PLUGINS``, e.g. ``linkedin=pkg.creator:Creator``.
+        """
+        for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+            name, _, target = item.partition("=")
+            self.register(name.strip(), target.strip())
+
+    def names(self) -> List[str]:
+        self._load_entry_points()
+        return sorted(self._targets)
+
+    def __contains__(self, name: str) -> bool:
+        self._load_entry_points()
+        return name in self._targets
+
+    def get(self, name: str) -> ScannerCreator:
+        """
+        Import and instantiate the creator of a scanner on first use.
+
+        :raises Exception: If no scanner is registered under that name.
+        """
+        self._load_entry_points()
+        with self._lock:
+            creator = self._creators.get(name)
+            if creator is not None:
+                return creator
+
+            target = self._targets.get(name)
+            if target is None:
+                raise Exception("Scanner not found!")
+
+            module_name, _, class_name = target.partition(":")
+            creator_class = getattr(import_module(module_name), class_name)
+            if not issubclass(creator_class, ScannerCreator):
+                raise Exception(f"Scanner [{name}] does not point to a ScannerCreator: {target}")
+            creator = self._creators[name] = creator_class()
+            return creator
+
+    def _load_entry_points(self) -> None:
+        if self._entry_points_loaded:
+            return
+        with self._lock:
+            if self._entry_points_loaded:
+                return
+            discovered = entry_points()
+            if hasattr(discovered, "select"):
+                group = discovered.select(group=ENTRY_POINT_GROUP)
+            else:
+                # Python < 3.10 returns a dict of groups.
+                group = cast(Any, discovered).get(ENTRY_POINT_GROUP, [])
+            for entry_point in group:
+                # Explicit declarations win over installed packages.
+                self._targets.setdefault(entry_point.name, entry_point.value)
+            self._entry_points_loaded = True
+
+
+scanner_registry = ScannerRegistry(BUILTIN_SCANNERS)
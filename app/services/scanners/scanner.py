@@ -1,5 +1,18 @@
 from abc import abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+
+class ScraperError(Exception):
+    """
+    Scan failure, tagged with the stage that failed so retries can back off accordingly.
+    """
+
+    def __init__(self, message: str, stage: Optional[str] = None) -> None:
+        super().__init__(message)
+        self.stage = stage
+
+    def __reduce__(self) -> Any:
+        return self.__class__, (str(self), self.stage)
 
 
 class Scanner:
@@ -7,3 +20,8 @@ class Scanner:
     @abstractmethod
     def run(self) -> List[Dict[str, Any]]:
         pass
+
+    def commit(self) -> None:
+        """
+        Called once the result of ``run`` has been persisted, e.g. to remember what was scanned.
+        """
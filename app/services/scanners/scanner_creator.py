@@ -1,10 +1,13 @@
 from abc import abstractmethod
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 
 from app.services.scanners.scanner import Scanner
 
 
 class ScannerCreator:
+    # Settings the scanner cannot run without, checked before a scanner is created.
+    required_settings: Tuple[str, ...] = ()
+
     def __init__(self) -> None:
         self._scanner: Optional[Scanner] = None
 
@@ -18,3 +21,7 @@ class ScannerCreator:
         data_to_send = self._scanner.run()
 
         return data_to_send
+
+    def commit_scanner(self) -> None:
+        if self._scanner is not None:
+            self._scanner.commit()
@@ -1,14 +1,49 @@
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 
+from app.repository.base import BaseRepository
+from app.services.scanners.incremental import diff_records, is_unchanged
 from app.services.scanners.scanner_creator import ScannerCreator
 
 
 class ScannerService:
 
-    def __init__(self, scanner: ScannerCreator):
+    def __init__(self, scanner: ScannerCreator, repository: Optional[BaseRepository] = None):
         self._service = scanner
+        self._repository = repository
 
-    def boot(self, scanner_settings: Dict[str, str]) -> list:
-        data_extracted = self._service.run_scanner(scanner_settings)
+    def boot(self, scanner_settings: Dict[str, Any]) -> Any:
+        data_extracted: Any = self._service.run_scanner(scanner_settings)
+
+        if not data_extracted or is_unchanged(data_extracted):
+            return data_extracted
+
+        previous = None
+        if self._repository is not None:
+            previous = self._save(self._repository, data_extracted)
+        # Only remember the scanned payload once its record is stored, so a failed save
+        # is not mistaken for an unchanged profile on the next incremental scan.
+        self._service.commit_scanner()
+
+        if scanner_settings.get("incremental") and previous is not None:
+            return {
+                "unchanged": False,
+                "id": data_extracted.get("id"),
+                "diff": diff_records(previous, data_extracted),
+            }
 
         return data_extracted
+
+    @staticmethod
+    def _save(repository: BaseRepository, record: dict) -> Optional[dict]:
+        """
+        Insert or update the record by id.
+
+        :return: The stored record it replaced, if any.
+        """
+        record_id = record.get("id")
+        existing = repository.read({"id": record_id}) if record_id else []
+        if existing:
+            repository.update({"id": record_id}, record)
+            return existing[0]
+        repository.create(record)
+        return None
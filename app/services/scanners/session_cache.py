@@ -0,0 +1,80 @@
+from typing import Any, Dict, List, Optional
+
+from flask import current_app
+
+from app.services.cache import FileCache, get_cache_directory
+
+
+class LoginSessionCache:
+    """
+    Post-login cookie jar and tokens saved per scanner account.
+
+    Restoring a saved session lets repeat scans of the same account skip the
+    password login entirely.
+    """
+
+    def __init__(self, cache: FileCache, scanner_name: str) -> None:
+        self._cache = cache
+        self._scanner_name = scanner_name
+
+    def load(self, account: str) -> Optional[Dict[str, Any]]:
+        """
+        :param account: Account identifier, usually the username.
+        :return: Saved ``{"cookies": [...], "tokens": {...}}`` or None.
+        """
+        state = self._cache.get(self._key(account))
+        if not state or not state.get("cookies"):
+            return None
+        return state
+
+    def save(self, account: str, cookies: List[Dict[str, Any]], tokens: Dict[str, str]) -> None:
+        self._cache.set(self._key(account), {"cookies": cookies, "tokens": tokens})
+
+    def invalidate(self, account: str) -> None:
+        self._cache.delete(self._key(account))
+
+    def _key(self, account: str) -> str:
+        return f"login:{self._scanner_name}:{account}"
+
+
+class CiphertextCache:
+    """
+    Profile ciphertext saved per scanner account; it never changes for an account,
+    so repeat scans can skip the page it is scraped from.
+    """
+
+    def __init__(self, cache: FileCache, scanner_name: str) -> None:
+        self._cache = cache
+        self._scanner_name = scanner_name
+
+    def get(self, account: str) -> Optional[str]:
+        return self._cache.get(self._key(account))
+
+    def save(self, account: str, ciphertext: str) -> None:
+        self._cache.set(self._key(account), ciphertext)
+
+    def invalidate(self, account: str) -> None:
+        self._cache.delete(self._key(account))
+
+    def _key(self, account: str) -> str:
+        return f"ciphertext:{self._scanner_name}:{account}"
+
+
+def get_login_session_cache(scanner_name: str) -> LoginSessionCache:
+    config = current_app.config
+    cache = FileCache(
+        directory=get_cache_directory("sessions"),
+        ttl=float(config.get("SESSION_CACHE_TTL") or 3600),
+        max_entries=int(config.get("SESSION_CACHE_MAX_ENTRIES") or 1000),
+    )
+    return LoginSessionCache(cache, scanner_name)
+
+
+def get_ciphertext_cache(scanner_name: str) -> CiphertextCache:
+    config = current_app.config
+    cache = FileCache(
+        directory=get_cache_directory("ciphertexts"),
+        ttl=float(config.get("CIPHERTEXT_CACHE_TTL") or 30 * 86400),
+        max_entries=int(config.get("CIPHERTEXT_CACHE_MAX_ENTRIES") or 100000),
+    )
+    return CiphertextCache(cache, scanner_name)
@@ -0,0 +1,199 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, cast
+
+import redis
+from celery import current_task
+from flask import current_app
+
+from app.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+SessionEntry = Dict[str, Any]
+
+
+def current_task_id() -> Optional[str]:
+    return current_task.request.id if current_task else None
+
+
+class SessionRegistry:
+    """
+    Every Remote WebDriver session opened by a worker process, with the process and
+    task that own it, in Redis.
+
+    Each owning process keeps a heartbeat key alive while it runs. When a process dies
+    without closing its sessions (OOM kill, SIGKILL, lost container), its heartbeat
+    expires and ``reap`` closes the sessions it left on the hub. Each process also keeps
+    the set of sessions it opened and that are still on the hub, so it can count them
+    without reading the whole registry.
+
+    :param owner_ttl: Seconds without a heartbeat after which an owner is considered dead.
+    """
+
+    def __init__(self, client: redis.Redis, hub_url: str, owner_ttl: int = 120, prefix: str = "webdriver") -> None:
+        self._client = client
+        self._hub_url = hub_url
+        self._owner_ttl = owner_ttl
+        self._sessions_key = f"{prefix}:sessions"
+        self._owner_prefix = f"{prefix}:owner:"
+        self._owned_prefix = f"{prefix}:owned:"
+        self._owner = f"{socket.gethostname()}-{os.getpid()}"
+        self._heartbeat_thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def register(self, session_id: str, lease: Optional[str] = None) -> None:
+        self._start_heartbeat()
+        owned_key = self._owned_prefix + self._owner
+        with self._client.pipeline() as pipe:
+            pipe.hset(self._sessions_key, session_id, json.dumps({
+                "owner": self._owner,
+                "task_id": current_task_id(),
+                "hub_url": self._hub_url,
+                "lease": lease,
+                "created_at": time.time(),
+            }))
+            pipe.sadd(owned_key, session_id)
+            pipe.expire(owned_key, self._owner_ttl)
+            pipe.execute()
+
+    def assign(self, session_id: str, task_id: Optional[str]) -> None:
+        """
+        Record the task a session is checked out by, or None when it goes back to the pool.
+        """
+        self._update(session_id, task_id=task_id)
+
+    def abandon(self, session_id: str) -> None:
+        """
+        Give up a session the owner failed to close, so the next ``reap`` closes it.
+        """
+        self._update(session_id, owner=None, abandoned_by=self._owner, created_at=0)
+
+    def unregister(self, session_id: str, owner: Optional[str] = None) -> None:
+        """
+        Forget a session once it is closed on the hub.
+
+        :param owner: Process that opened it, if not this one.
+        """
+        with self._client.pipeline() as pipe:
+            pipe.hdel(self._sessions_key, session_id)
+            pipe.srem(self._owned_prefix + (owner or self._owner), session_id)
+            pipe.execute()
+
+    def sessions(self) -> Dict[str, SessionEntry]:
+        """
+        :return: Registered sessions, each flagged with whether its owner is alive.
+        """
+        sessions = {}
+        for session_id, entry in self._entries().items():
+            entry["alive"] = self._is_alive(entry["owner"])
+            sessions[session_id] = entry
+        return sessions
+
+    def owned_count(self) -> int:
+        """
+        :return: Number of sessions this process opened that are still on the hub,
+            including the ones it abandoned and ``reap`` has not closed yet.
+        """
+        return int(self._client.scard(self._owned_prefix + self._owner))
+
+    def reap(self, close: Callable[[str, SessionEntry], None]) -> List[str]:
+        """
+        Close the sessions of owners that stopped sending heartbeats.
+
+        :param close: Ends a session on the hub; failures leave it for the next run.
+        :return: Ids of the sessions closed.
+        """
+        reaped = []
+        for session_id, entry in self.sessions().items():
+            if entry["alive"] or time.time() - entry.get("created_at", 0) < self._owner_ttl:
+                continue
+            try:
+                close(session_id, entry)
+            except Exception as err:
+                logger.warning(f"Failed to close orphaned WebDriver session {session_id}: {err}")
+                continue
+            self.unregister(session_id, entry.get("abandoned_by") or entry.get("owner"))
+            reaped.append(session_id)
+        return reaped
+
+    def heartbeat(self) -> None:
+        with self._client.pipeline() as pipe:
+            pipe.set(self._owner_prefix + self._owner, "1", ex=self._owner_ttl)
+            pipe.expire(self._owned_prefix + self._owner, self._owner_ttl)
+            pipe.execute()
+
+    def _entries(self) -> Dict[str, SessionEntry]:
+        # The client decodes responses.
+        raw_entries = cast(Dict[str, str], self._client.hgetall(self._sessions_key))
+        return {session_id: json.loads(raw) for session_id, raw in raw_entries.items()}
+
+    def _update(self, session_id: str, **fields: Any) -> None:
+        raw = self._client.hget(self._sessions_key, session_id)
+        if raw is None:
+            return
+        self._client.hset(self._sessions_key, session_id, json.dumps({**json.loads(raw), **fields}))
+
+    def _is_alive(self, owner: Optional[str]) -> bool:
+        return owner is not None and bool(self._client.exists(self._owner_prefix + owner))
+
+    def _start_heartbeat(self) -> None:
+        with self._lock:
+            if self._heartbeat_thread is not None:
+                return
+            self.heartbeat()
+            self._heartbeat_thread = threading.Thread(
+                target=self._beat, name="webdriver-session-heartbeat", daemon=True
+            )
+            self._heartbeat_thread.start()
+
+    def _beat(self) -> None:
+        while True:
+            time.sleep(self._owner_ttl / 3)
+            try:
+                self.heartbeat()
+            except redis.RedisError as err:
+                logger.warning(f"Failed to send the WebDriver session heartbeat: {err}")
+
+
+def delete_hub_session(session_id: str, entry: SessionEntry) -> None:
+    """
+    End a session on the hub it was created on; an unknown session is already gone.
+    """
+    hub_url = entry.get("hub_url")
+    if not hub_url:
+        raise ValueError("The session has no hub URL")
+    # Imported here, like the scanner stack, to keep it out of the web process.
+    import requests
+
+    response = requests.delete(f"{hub_url.rstrip('/')}/session/{session_id}", timeout=10)
+    if response.status_code != 404:
+        response.raise_for_status()
+
+
+_registries: Dict[int, SessionRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_session_registry() -> Optional[SessionRegistry]:
+    """
+    :return: The session registry of the current process, or None if
+        ``SESSION_REAPER_ENABLED`` is off.
+    """
+    config = current_app.config
+    if not config.get("SESSION_REAPER_ENABLED"):
+        return None
+
+    pid = os.getpid()
+    with _registries_lock:
+        if pid not in _registries:
+            _registries[pid] = SessionRegistry(
+                get_redis(),
+                config.get("SELENIUM_HUB_URL") or "",
+                owner_ttl=int(config.get("SESSION_OWNER_TTL") or 120),
+            )
+        return _registries[pid]
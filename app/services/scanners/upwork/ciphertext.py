@@ -0,0 +1,79 @@
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+PROFILE_LINK_TEXT = "Profile"
+CHUNK_SIZE = 64 * 1024
+
+
+class _ProfileLinkFound(Exception):
+    pass
+
+
+class _ProfileLinkParser(HTMLParser):
+    """
+    Tokenizes the page without building a tree and stops at the first anchor
+    whose text is ``Profile``.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.href: Optional[str] = None
+        self._anchor_href: Optional[str] = None
+        self._anchor_text: List[str] = []
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag == "a":
+            self._anchor_href = dict(attrs).get("href")
+            self._anchor_text = []
+
+    def handle_data(self, data: str) -> None:
+        if self._anchor_href:
+            self._anchor_text.append(data)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag != "a" or not self._anchor_href:
+            return
+        if "".join(self._anchor_text).strip() == PROFILE_LINK_TEXT:
+            self.href = self._anchor_href
+            raise _ProfileLinkFound
+        self._anchor_href = None
+
+
+def extract_ciphertext(html: str) -> Optional[str]:
+    """
+    Extract the profile ciphertext from the href of the best matches page's
+    ``Profile`` link.
+
+    :param html: HTML content as a string.
+    :return: Ciphertext if found, otherwise None.
+    """
+    if not html or PROFILE_LINK_TEXT not in html:
+        return None
+
+    href = _find_profile_href(html) or _find_profile_href_with_soup(html)
+    if href:
+        return href.split("/")[-1]
+    return None
+
+
+def _find_profile_href(html: str) -> Optional[str]:
+    parser = _ProfileLinkParser()
+    try:
+        for start in range(0, len(html), CHUNK_SIZE):
+            parser.feed(html[start:start + CHUNK_SIZE])
+        parser.close()
+    except _ProfileLinkFound:
+        return parser.href
+    except Exception:
+        return None
+    return None
+
+
+def _find_profile_href_with_soup(html: str) -> Optional[str]:
+    soup = BeautifulSoup(html, "html.parser")
+    profile_link = soup.find("a", href=True, text=PROFILE_LINK_TEXT)
+    if profile_link:
+        return profile_link["href"]
+    return None
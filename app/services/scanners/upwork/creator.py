@@ -6,6 +6,8 @@ from app.services.scanners.scanner import Scanner
 
 
 class UpworkCreator(ScannerCreator):
+    required_settings = ("url", "username", "password")
+
     def create_scanner(self, scanner_settings: Dict[str, str]) -> Scanner:
         scrapper = UpworkScraper(scanner_settings)
         return UpworkScanner(scrapper)
@@ -1,7 +1,13 @@
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
 from pydantic import BaseModel, Field, validator
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Deque, Iterable, Iterator, List
 from datetime import datetime
 
+DATE_FIELDS = ('birth_date', 'original_hire_date', 'hire_date', 'termination_date', 'created_at', 'updated_at')
+
 
 class Address(BaseModel):
     city: Optional[str] = None
@@ -53,11 +59,12 @@ class ParsedProfile(BaseModel):
     updated_at: Optional[str] = Field(default=None)
     metadata: Dict = Field(default_factory=dict)
 
-    @validator('birth_date', 'original_hire_date', 'hire_date', 'termination_date', 'created_at', 'updated_at',
-               pre=True, always=True)
+    @validator(*DATE_FIELDS, pre=True, always=True)
     def validate_dates(cls, value):
         if value in (None, ""):
             return ""
+        if isinstance(value, str):
+            return _normalize_date(value)
         try:
             datetime.fromisoformat(value)
             return value
@@ -65,7 +72,17 @@ class ParsedProfile(BaseModel):
             return ""
 
 
-def parse_profile(response_json: Dict[str, Any]) -> ParsedProfile:
+@lru_cache(maxsize=4096)
+def _normalize_date(value: str) -> str:
+    # Dates repeat a lot across records (memberSince, updatedOn, ...), so cache the check.
+    try:
+        datetime.fromisoformat(value)
+        return value
+    except ValueError:
+        return ""
+
+
+def _profile_fields(response_json: Dict[str, Any]) -> Dict[str, Any]:
     profile = response_json.get("profile", {})
     identity = profile.get("identity", {})
     profile_data = profile.get("profile", {})
@@ -75,10 +92,10 @@ def parse_profile(response_json: Dict[str, Any]) -> ParsedProfile:
 
     person_data = response_json.get("person")
 
-    return ParsedProfile(
+    return dict(
         id=identity.get("ciphertext", ""),
         account=identity.get("uid", ""),
-        address=Address(
+        address=dict(
             city=location.get("city"),
             state=location.get("state"),
             country=location.get("country"),
@@ -89,10 +106,84 @@ def parse_profile(response_json: Dict[str, Any]) -> ParsedProfile:
         birth_date=person_data.get("dateOfBirth", ""),
         picture_url=portrait.get("portrait", ""),
         job_title=profile_data.get("title", ""),
-        base_pay=BasePay(
+        base_pay=dict(
             amount=str(stats.get("hourlyRate", {}).get("amount", "")),
             currency=stats.get("hourlyRate", {}).get("currencyCode", ""),
         ),
         created_at=profile_data.get("memberSince", ""),
         updated_at=person_data.get("updatedOn", ""),
     )
+
+
+def parse_profile(response_json: Dict[str, Any]) -> ParsedProfile:
+    fields = _profile_fields(response_json)
+
+    return ParsedProfile(
+        **{
+            **fields,
+            "address": Address(**fields["address"]),
+            "base_pay": BasePay(**fields["base_pay"]),
+        }
+    )
+
+
+def parse_trusted_profile(response_json: Dict[str, Any]) -> ParsedProfile:
+    """
+    Build the profile without pydantic validation, for payloads we produced ourselves
+    (archived raw responses). Dates are still normalized, so the result is the same as
+    ``parse_profile`` for well-formed payloads.
+    """
+    fields = _profile_fields(response_json)
+    for field in DATE_FIELDS:
+        value = fields.get(field)
+        fields[field] = _normalize_date(value) if isinstance(value, str) and value else ""
+
+    return ParsedProfile.construct(
+        **{
+            **fields,
+            "address": Address.construct(**fields["address"]),
+            "base_pay": BasePay.construct(**fields["base_pay"]),
+        }
+    )
+
+
+def parse_profiles(
+        payloads: Iterable[Dict[str, Any]],
+        trusted: bool = False,
+        processes: Optional[int] = None,
+        chunksize: int = 500,
+) -> Iterator[ParsedProfile]:
+    """
+    Parse many raw profile payloads, yielding results in input order as they are ready.
+
+    :param payloads: Raw profile details, consumed lazily.
+    :param trusted: Skip pydantic validation, see ``parse_trusted_profile``.
+    :param processes: Spread the chunks over this many worker processes.
+    :param chunksize: Payloads sent to a worker process at a time.
+    """
+    parser = parse_trusted_profile if trusted else parse_profile
+
+    if not processes or processes <= 1:
+        for payload in payloads:
+            yield parser(payload)
+        return
+
+    iterator = iter(payloads)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        pending: Deque[Future] = deque()
+        while True:
+            chunk = list(islice(iterator, chunksize))
+            if not chunk:
+                break
+            pending.append(executor.submit(_parse_chunk, chunk, trusted))
+            # Bounded read-ahead keeps memory flat on large backfills.
+            if len(pending) >= processes * 2:
+                yield from pending.popleft().result()
+
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _parse_chunk(payloads: List[Dict[str, Any]], trusted: bool) -> List[ParsedProfile]:
+    parser = parse_trusted_profile if trusted else parse_profile
+    return [parser(payload) for payload in payloads]
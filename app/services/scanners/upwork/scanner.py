@@ -10,3 +10,6 @@ class UpworkScanner(Scanner):
 
     def run(self) -> Dict[str, Any]:
         return self._scrapper.start_searching()
+
+    def commit(self) -> None:
+        self._scrapper.save_scan_state()
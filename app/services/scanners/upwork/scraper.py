@@ -1,10 +1,83 @@
 import json
-from typing import Dict, Optional, Any
-from selenium.common import JavascriptException
-from bs4 import BeautifulSoup
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple, Any
+from urllib.parse import urlsplit
+from selenium.common import JavascriptException, WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
 import requests
+from requests.adapters import HTTPAdapter
+from app.services.metrics import record_driver_failure, stage
+from app.services.rate_limiter import RateLimitExceeded, get_rate_limiter
+from .ciphertext import extract_ciphertext
 from .parser import parse_profile
-from ..browser import get_remote_webdriver
+from ..checkpoint import ScanCheckpoint, get_scan_checkpoint
+from ..driver_pool import DriverPoolTimeout, get_driver_pool
+from ..incremental import fingerprint, get_scan_state_store, unchanged_result
+from ..scanner import ScraperError
+from ..session_cache import get_ciphertext_cache, get_login_session_cache
+
+logger = logging.getLogger(__name__)
+
+# Shared by every scraper of the worker so keep-alive connections outlive a single scan,
+# while each scraper keeps its own cookie jar.
+_http_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+
+# Endpoint classes sharing a rate limit, by URL path prefix.
+_ENDPOINT_CLASSES = (
+    ("/ab/account-security/login", "login"),
+    ("/nx/find-work/", "best_matches"),
+    ("/freelancers/api/", "profile_details"),
+)
+
+# Markers of the bot challenge page served instead of the requested one.
+_CHALLENGE_MARKERS = ("challenge-platform", "cf-chl", "Just a moment...")
+
+
+# Runs every request spec concurrently in the page and reports each outcome through the
+# async script callback, so a whole batch costs one WebDriver round trip.
+_FETCH_MANY_SCRIPT = """
+const specs = arguments[0];
+const done = arguments[arguments.length - 1];
+Promise.all(specs.map(spec => {
+  const controller = new AbortController();
+  const timer = setTimeout(() => controller.abort(), spec.timeout);
+  return fetch(spec.url, {
+    "headers": spec.headers,
+    "method": spec.method,
+    "body": spec.body,
+    "mode": "cors",
+    "credentials": "include",
+    "signal": controller.signal
+  }).then(response => {
+    const contentType = response.headers.get("content-type") || "";
+    const isJson = contentType.includes("application/json");
+    return (isJson ? response.json() : response.text()).then(body => ({
+      "status": response.status,
+      "body": body,
+      "error": spec.expectJson && !isJson ? `Expected JSON, got [${contentType}]` : null
+    }));
+  }).catch(err => ({
+    "status": null,
+    "body": null,
+    "error": err.name === "AbortError" ? `Timed out after ${spec.timeout}ms` : String(err)
+  })).finally(() => clearTimeout(timer));
+})).then(done);
+"""
+
+
+class UpworkFetchError(Exception):
+    def __init__(self, url: str, error: str) -> None:
+        super().__init__(f"Request to {url} failed: {error}")
+        self.url = url
+        self.error = error
+
+
+class UpworkResponseError(Exception):
+    def __init__(self, url: str, status: int) -> None:
+        super().__init__(f"Upwork responded with status {status} for {url}")
+        self.url = url
+        self.status = status
 
 
 class UpworkScraper:
@@ -14,11 +87,87 @@ class UpworkScraper:
 
         :param scanner_settings: Dictionary containing settings for the scanner.
         """
-        self._base_url = "https://www.upwork.com"
+        self._base_url = scanner_settings.get("base_url", "https://www.upwork.com").rstrip("/")
         self._scanner_settings = scanner_settings
-        self._driver = get_remote_webdriver()
+        self._driver_pool = get_driver_pool()
+        self._driver: Optional[WebDriver] = None
         self._session = requests.Session()
-        self._ciphertext_url = "https://www.upwork.com/nx/find-work/best-matches"
+        self._session.mount("https://", _http_adapter)
+        self._session.mount("http://", _http_adapter)
+        self._session_ready = False
+        self._use_http = scanner_settings.get("transport", "browser") == "http"
+        self._http_timeout = float(scanner_settings.get("http_timeout", 30))
+        self._ciphertext_url = f"{self._base_url}/nx/find-work/best-matches"
+        # Lightweight same-origin page used to attach restored cookies to the domain.
+        self._cookie_origin_url = f"{self._base_url}/robots.txt"
+        # Page loaded before a password login for its visitor cookies.
+        warm_up_url = scanner_settings.get("warm_up_url") or "/"
+        self._warm_up_url = warm_up_url if "://" in warm_up_url else f"{self._base_url}/{warm_up_url.lstrip('/')}"
+        self._session_cache = get_login_session_cache("upwork")
+        self._ciphertext_cache = get_ciphertext_cache("upwork")
+        self._incremental = bool(scanner_settings.get("incremental", False))
+        checkpoint_key = scanner_settings.get("checkpoint_key")
+        self._checkpoint: Optional[ScanCheckpoint] = (
+            get_scan_checkpoint("upwork", checkpoint_key) if checkpoint_key else None
+        )
+        self._current_stage: Optional[str] = None
+        # Fingerprint, updatedOn and record id of the payload parsed by an incremental scan.
+        self._scan_state: Optional[Tuple[str, str, Optional[str]]] = None
+        self._rate_limiter = get_rate_limiter()
+
+    @property
+    def driver(self) -> WebDriver:
+        """
+        Borrow a WebDriver session from the worker pool on first use.
+
+        :return: WebDriver checked out for this scan.
+        """
+        if self._driver is None:
+            with self._stage("driver_acquire"):
+                try:
+                    self._driver = self._driver_pool.acquire(tenant=self._scanner_settings.get("tenant"))
+                except DriverPoolTimeout:
+                    record_driver_failure("upwork", "pool_timeout")
+                    raise
+                except Exception:
+                    record_driver_failure("upwork", "session_start")
+                    raise
+        return self._driver
+
+    def _release_driver(self, discard: bool = False) -> None:
+        """
+        Return the borrowed WebDriver session to the pool.
+
+        :param discard: Quit the session instead of reusing it.
+        """
+        if self._driver is not None:
+            self._driver_pool.release(self._driver, discard=discard)
+            self._driver = None
+
+    @contextmanager
+    def _stage(self, name: str) -> Iterator[None]:
+        """
+        Time a stage of the scan and remember it as the one to blame if the scan fails
+        before the stage completes.
+
+        :param name: Stage name.
+        """
+        previous = self._current_stage
+        self._current_stage = name
+        with stage("upwork", name):
+            yield
+        self._current_stage = previous
+
+    def _load_checkpoint(self) -> Dict[str, Any]:
+        return self._checkpoint.load() if self._checkpoint else {}
+
+    def _save_checkpoint(self, **stages: Any) -> None:
+        if self._checkpoint:
+            self._checkpoint.save(**stages)
+
+    def _discard_checkpoint(self, *stages: str) -> None:
+        if self._checkpoint:
+            self._checkpoint.discard(*stages)
 
     def get_tokens_from_cookies(self) -> Dict[str, str]:
         """
@@ -26,7 +175,7 @@ class UpworkScraper:
 
         :return: Dictionary of tokens.
         """
-        cookies = self._driver.get_cookies()
+        cookies = self.driver.get_cookies()
         tokens = {}
         for cookie in cookies:
             if "xsrf" in cookie["name"].lower():
@@ -45,35 +194,219 @@ class UpworkScraper:
 
         :return: Parsed profile data.
         """
+        broken = False
         try:
-            self._driver.get(self._base_url)
-            tokens = self.get_tokens_from_cookies()
+            # A retry of the same task resumes from the raw details it already fetched.
+            profile_details = self._load_checkpoint().get("details")
+            if profile_details is None:
+                profile_details = self._fetch_profile_details()
+                self._save_checkpoint(details=profile_details)
 
-            self._login(tokens)
-            ciphertext = self._get_ciphertext()
-
-            if not ciphertext:
-                raise ValueError("Failed to retrieve ciphertext from Upwork")
+            if self._incremental:
+                return self._parse_if_changed(profile_details)
 
-            profile_details = self._get_profile_details(ciphertext)
-            parsed_profile = parse_profile(profile_details)
+            with self._stage("parse"):
+                parsed_profile = parse_profile(profile_details)
         except JavascriptException as e:
-            self._driver.quit()
-            raise Exception(f"JavaScript execution failed during scraping!")
+            raise ScraperError(f"JavaScript execution failed during scraping!", stage=self._current_stage)
+        except WebDriverException as e:
+            broken = True
+            record_driver_failure("upwork", "webdriver_error")
+            raise ScraperError(f"Scraper failed with error: {e}", stage=self._current_stage)
+        except RateLimitExceeded:
+            # Raised as is, so the task retries once the rate limit lets the request through.
+            raise
         except Exception as e:
-            self._driver.quit()
-            raise Exception(f"Scraper failed with error: {e}")
+            raise ScraperError(f"Scraper failed with error: {e}", stage=self._current_stage)
+        finally:
+            self._release_driver(discard=broken)
 
-        self._driver.quit()
         return parsed_profile.dict()
 
+    def _parse_if_changed(self, profile_details: Dict) -> Dict[str, Any]:
+        """
+        Skip parsing when the payload matches the last one scanned for the account.
+
+        :param profile_details: Raw profile details.
+        :return: Parsed profile data, or an ``unchanged`` marker.
+        """
+        username = self._scanner_settings["username"]
+        state_store = get_scan_state_store("upwork")
+
+        digest = fingerprint(profile_details)
+        updated_on = (profile_details.get("person") or {}).get("updatedOn", "")
+
+        state = state_store.get(username)
+        if state and state["fingerprint"] == digest and state["updated_on"] == updated_on:
+            return unchanged_result(state["id"], digest)
+
+        with self._stage("parse"):
+            parsed_profile = parse_profile(profile_details).dict()
+        self._scan_state = (digest, updated_on, parsed_profile["id"])
+        return parsed_profile
+
+    def save_scan_state(self) -> None:
+        """
+        Remember the fingerprint of the payload parsed by an incremental scan, once its
+        result has been persisted.
+        """
+        if self._scan_state is None:
+            return
+        digest, updated_on, record_id = self._scan_state
+        get_scan_state_store("upwork").save(self._scanner_settings["username"], digest, updated_on, record_id)
+        self._scan_state = None
+
+    def _fetch_profile_details(self) -> Dict:
+        """
+        Log in as the account and fetch its raw profile details.
+
+        :return: Profile details.
+        """
+        profile_details = self._get_cached_profile_details()
+        if profile_details is not None:
+            return profile_details
+
+        ciphertext = self._authenticate()
+
+        if not ciphertext:
+            raise ValueError("Failed to retrieve ciphertext from Upwork")
+
+        self._save_checkpoint(ciphertext=ciphertext)
+        self._detach_browser()
+        profile_details = self._get_profile_details(ciphertext)
+        self._ciphertext_cache.save(self._scanner_settings["username"], ciphertext)
+        return profile_details
+
+    def _get_cached_profile_details(self) -> Optional[Dict]:
+        """
+        Fetch the profile details straight away when the ciphertext of the account is
+        cached, or was checkpointed by a previous attempt, skipping the best matches page.
+
+        :return: Profile details, or None if there is no usable cached ciphertext.
+        """
+        username = self._scanner_settings["username"]
+        ciphertext = self._load_checkpoint().get("ciphertext") or self._ciphertext_cache.get(username)
+        if not ciphertext:
+            return None
+
+        restored = self._restore_session(username)
+        if not restored:
+            tokens = self._password_login()
+            self._session_cache.save(username, self.driver.get_cookies(), tokens)
+
+        while True:
+            self._detach_browser()
+            try:
+                return self._get_profile_details(ciphertext)
+            except UpworkResponseError as err:
+                if err.status not in (401, 403, 404):
+                    raise
+                if err.status == 404 or not restored:
+                    # Not found, or forbidden to a fresh login: the ciphertext is stale.
+                    logger.info(f"Cached ciphertext was rejected with status {err.status}, fetching it again")
+                    self._ciphertext_cache.invalidate(username)
+                    self._discard_checkpoint("ciphertext")
+                    return None
+                # The restored session expired; the ciphertext is still valid.
+                logger.info(f"Cached Upwork session was rejected with status {err.status}, logging in again")
+
+            self._session_cache.invalidate(username)
+            self._discard_checkpoint("cookies", "tokens")
+            self.driver.delete_all_cookies()
+            tokens = self._password_login()
+            self._session_cache.save(username, self.driver.get_cookies(), tokens)
+            self._session_ready = False
+            restored = False
+
+    def _detach_browser(self) -> None:
+        """
+        On the HTTP transport, copy the authenticated cookies into the HTTP session and
+        hand the browser back to the pool before the remaining requests.
+        """
+        if not self._use_http:
+            return
+        if not self._session_ready:
+            self._copy_browser_session()
+        self._release_driver()
+
+    def _authenticate(self) -> str:
+        """
+        Restore the cached login session of the account, falling back to a fresh
+        password login when there is none or Upwork rejects it.
+
+        :return: Ciphertext of the logged-in profile, empty if login failed.
+        """
+        username = self._scanner_settings["username"]
+
+        if self._restore_session(username):
+            try:
+                ciphertext = self._get_ciphertext()
+            except UpworkResponseError:
+                ciphertext = ""
+            if ciphertext:
+                return ciphertext
+            logger.info("Cached Upwork session was rejected, logging in again")
+            self._session_cache.invalidate(username)
+            self._discard_checkpoint("cookies", "tokens")
+            self.driver.delete_all_cookies()
+
+        tokens = self._password_login()
+        ciphertext = self._get_ciphertext()
+
+        if ciphertext:
+            self._session_cache.save(username, self.driver.get_cookies(), tokens)
+        return ciphertext
+
+    def _password_login(self) -> Dict[str, str]:
+        """
+        Load the warm-up page for fresh visitor tokens and log in with the account password.
+
+        :return: Tokens used for the login.
+        """
+        driver = self.driver
+        with self._stage("home_page"):
+            driver.get(self._warm_up_url)
+        tokens = self.get_tokens_from_cookies()
+        with self._stage("login"):
+            self._login(tokens)
+        self._save_checkpoint(tokens=tokens, cookies=driver.get_cookies())
+        return tokens
+
+    def _restore_session(self, username: str) -> bool:
+        """
+        Load the cookie jar of the account into the browser, preferring the one a previous
+        attempt of this scan logged in with.
+
+        :param username: Account whose session should be restored.
+        :return: True if a cached session was restored.
+        """
+        checkpoint = self._load_checkpoint()
+        state: Optional[Dict[str, Any]]
+        if checkpoint.get("cookies"):
+            state = {"cookies": checkpoint["cookies"], "tokens": checkpoint.get("tokens", {})}
+        else:
+            state = self._session_cache.load(username)
+        if not state:
+            return False
+
+        driver = self.driver
+        with self._stage("restore_session"):
+            driver.get(self._cookie_origin_url)
+            self._session_ready = False
+            for cookie in state["cookies"]:
+                try:
+                    driver.add_cookie(cookie)
+                except WebDriverException as err:
+                    logger.debug(f"Skipping cookie {cookie.get('name')}: {err}")
+        return True
+
     def _login(self, tokens: Dict[str, str]) -> None:
         """
         Perform the login action using tokens.
 
         :param tokens: Dictionary containing necessary tokens.
         """
-        req_params = dict(
+        req_params: Dict[str, Any] = dict(
             url=self._scanner_settings["url"],
             headers={
                 "accept": "*/*",
@@ -106,6 +439,7 @@ class UpworkScraper:
             },
             method="POST",
         )
+        self._session_ready = False
         self._fetch_with_script(**req_params)
 
     def _get_profile_details(self, ciphertext: str) -> dict:
@@ -115,8 +449,8 @@ class UpworkScraper:
         :param ciphertext: Ciphertext of the profile.
         :return: Profile details in JSON format.
         """
-        req_params = dict(
-            url=f"https://www.upwork.com/freelancers/api/v1/freelancer/profile/{ciphertext}/details?excludeAssignments=True",
+        req_params: Dict[str, Any] = dict(
+            url=f"{self._base_url}/freelancers/api/v1/freelancer/profile/{ciphertext}/details?excludeAssignments=True",
             headers={
                 "accept": "application/json, text/plain, */*",
                 "accept-language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
@@ -131,8 +465,10 @@ class UpworkScraper:
                 "x-requested-with": "XMLHttpRequest",
                 "x-upwork-accept-language": "en-US",
             },
+            expect_json=True,
         )
-        return self._fetch_with_script(**req_params)
+        with self._stage("profile_details"):
+            return self._fetch(**req_params)
 
     def _get_ciphertext(self) -> str:
         """
@@ -140,23 +476,24 @@ class UpworkScraper:
 
         :return: Ciphertext string.
         """
-        html_response = self._fetch_with_script(
-            url=self._ciphertext_url,
-            headers={
-                "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-                "accept-language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
-                "cache-control": "max-age=0",
-                "priority": "u=0, i",
-                "sec-ch-ua-mobile": "?0",
-                "sec-ch-ua-platform": "macOS",
-                "sec-fetch-dest": "document",
-                "sec-fetch-mode": "navigate",
-                "sec-fetch-site": "same-origin",
-                "sec-fetch-user": "?1",
-                "upgrade-insecure-requests": "1",
-            },
-        )
-        ciphertext = self._extract_ciphertext(html_response)
+        with self._stage("ciphertext"):
+            html_response = self._fetch(
+                url=self._ciphertext_url,
+                headers={
+                    "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
+                    "accept-language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
+                    "cache-control": "max-age=0",
+                    "priority": "u=0, i",
+                    "sec-ch-ua-mobile": "?0",
+                    "sec-ch-ua-platform": "macOS",
+                    "sec-fetch-dest": "document",
+                    "sec-fetch-mode": "navigate",
+                    "sec-fetch-site": "same-origin",
+                    "sec-fetch-user": "?1",
+                    "upgrade-insecure-requests": "1",
+                },
+            )
+            ciphertext = self._extract_ciphertext(html_response)
         if not ciphertext:
             return ""
         return ciphertext
@@ -168,13 +505,95 @@ class UpworkScraper:
         :param html: HTML content as a string.
         :return: Ciphertext if found, otherwise None.
         """
-        soup = BeautifulSoup(html, "html.parser")
-        profile_link = soup.find("a", href=True, text="Profile")
-        if profile_link:
-            href = profile_link["href"]
-            ciphertext = href.split("/")[-1]
-            return ciphertext
-        return None
+        return extract_ciphertext(html)
+
+    def _fetch(
+            self,
+            url: str,
+            headers: Dict[str, str],
+            body: Optional[Dict] = None,
+            method: str = "GET",
+            expect_json: bool = False,
+    ) -> Optional[Dict]:
+        """
+        Execute a request over the HTTP session when the scanner is configured with
+        ``"transport": "http"``, falling back to the browser if that fails.
+
+        :param url: URL to fetch.
+        :param headers: Headers to include in the request.
+        :param body: Body of the POST request, if any.
+        :param method: HTTP method to use.
+        :param expect_json: Fail if the response is not JSON.
+        :return: Response body, parsed as JSON if possible.
+        """
+        if self._use_http:
+            try:
+                return self._fetch_with_session(url, headers, body, method, expect_json)
+            except (requests.RequestException, UpworkFetchError) as err:
+                logger.warning(f"HTTP fast path failed for {url}, falling back to the browser: {err}")
+                self._use_http = False
+                if self._driver is None:
+                    self._restore_session(self._scanner_settings["username"])
+
+        return self._fetch_with_script(url, headers, body, method, expect_json)
+
+    def _fetch_with_session(
+            self,
+            url: str,
+            headers: Dict[str, str],
+            body: Optional[Dict] = None,
+            method: str = "GET",
+            expect_json: bool = False,
+    ) -> Any:
+        """
+        Execute a request over the keep-alive HTTP session with the browser cookies.
+
+        :param url: URL to fetch.
+        :param headers: Headers to include in the request.
+        :param body: Body of the POST request, if any.
+        :param method: HTTP method to use.
+        :param expect_json: Fail if the response is not JSON.
+        :return: Response body, parsed as JSON if possible.
+        :raises UpworkResponseError: If Upwork rejects the session or does not know the
+            resource, like the browser would, so the caller logs in again or refetches
+            the ciphertext instead of falling back to the browser.
+        """
+        if not self._session_ready:
+            self._copy_browser_session()
+
+        self._throttle(url)
+        response = self._session.request(
+            method, url, headers=headers, json=body, timeout=self._http_timeout
+        )
+        if self._is_throttled(response.status_code, response.text):
+            self._slow_down(url, response.headers.get("retry-after"))
+        if response.status_code in (401, 403, 404):
+            raise UpworkResponseError(url, response.status_code)
+        response.raise_for_status()
+
+        content_type = response.headers.get("content-type", "")
+        if "application/json" in content_type:
+            return response.json()
+        if expect_json:
+            raise UpworkFetchError(url, f"Expected JSON, got [{content_type}]")
+        return response.text
+
+    def _copy_browser_session(self) -> None:
+        """
+        Copy the authenticated cookies and user agent of the browser into the HTTP session.
+        """
+        self._session.cookies.clear()
+        for cookie in self.driver.get_cookies():
+            self._session.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie.get("domain", ""),
+                path=cookie.get("path", "/"),
+            )
+        self._session.headers["user-agent"] = self.driver.execute_script(
+            "return navigator.userAgent;"
+        )
+        self._session_ready = True
 
     def _fetch_with_script(
             self,
@@ -182,6 +601,7 @@ class UpworkScraper:
             headers: Dict[str, str],
             body: Optional[Dict] = None,
             method: str = "GET",
+            expect_json: bool = False,
     ) -> Optional[Dict]:
         """
         Execute a fetch request using JavaScript in the browser.
@@ -190,21 +610,86 @@ class UpworkScraper:
         :param headers: Headers to include in the fetch request.
         :param body: Body of the POST request, if any.
         :param method: HTTP method to use.
+        :param expect_json: Fail if the response is not JSON.
         :return: Response from the fetch request, parsed as JSON if possible.
+        :raises UpworkFetchError: If the request fails or times out.
+        :raises UpworkResponseError: If Upwork responds with an error status.
         """
-        fetch_script = f"""
-        return fetch("{url}", {{
-          "headers": {json.dumps(headers)},
-          "method": "{method}",
-          "body": {json.dumps(body) if body else "None"},
-          "mode": "cors",
-          "credentials": "include"
-        }}).then(response => {{
-              if (response.headers.get('content-type')?.includes('application/json')) {{
-                return response.json();
-              }} else {{
-                return response.text();
-              }}
-            }});
-        """
-        return self._driver.execute_script(fetch_script)
+        spec = dict(url=url, headers=headers, body=body, method=method, expect_json=expect_json)
+        response = self._fetch_many_with_script([spec])[0]
+
+        if response["error"] and response["status"] is None:
+            raise UpworkFetchError(url, response["error"])
+        if response["status"] >= 400:
+            raise UpworkResponseError(url, response["status"])
+        if response["error"]:
+            raise UpworkFetchError(url, response["error"])
+        return response["body"]
+
+    def _fetch_many_with_script(self, specs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Execute several fetch requests concurrently in the browser, in a single
+        WebDriver round trip.
+
+        :param specs: Requests, each with ``url`` and ``headers`` and optionally ``body``,
+            ``method``, ``expect_json`` and ``timeout`` (seconds).
+        :return: For each request, in order, a dict with the ``status`` (None if the request
+            failed), the ``body`` parsed as JSON if possible, and an ``error`` message or None.
+        """
+        script_specs = [
+            {
+                "url": spec["url"],
+                "headers": spec["headers"],
+                "body": json.dumps(spec["body"]) if spec.get("body") else None,
+                "method": spec.get("method", "GET"),
+                "expectJson": spec.get("expect_json", False),
+                "timeout": int(spec.get("timeout", self._http_timeout) * 1000),
+            }
+            for spec in specs
+        ]
+        driver = self.driver
+        for spec in script_specs:
+            self._throttle(spec["url"])
+
+        responses = driver.execute_async_script(_FETCH_MANY_SCRIPT, script_specs)
+        for spec, response in zip(script_specs, responses):
+            if self._is_throttled(response["status"], response["body"]):
+                self._slow_down(spec["url"])
+        return responses
+
+    def _throttle(self, url: str) -> None:
+        """
+        Wait for the shared rate limit of the URL's host and endpoint class.
+
+        :param url: URL about to be requested.
+        """
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire(urlsplit(url).netloc, self._endpoint_class(url))
+
+    def _slow_down(self, url: str, retry_after: Optional[str] = None) -> None:
+        """
+        Lower the shared rate limit after Upwork throttled a request.
+
+        :param url: URL that was throttled.
+        :param retry_after: ``Retry-After`` header of the response, if any.
+        """
+        if self._rate_limiter is None:
+            return
+        delay = float(retry_after) if retry_after and retry_after.isdigit() else None
+        self._rate_limiter.penalize(urlsplit(url).netloc, self._endpoint_class(url), delay)
+
+    @staticmethod
+    def _endpoint_class(url: str) -> str:
+        path = urlsplit(url).path
+        for prefix, endpoint in _ENDPOINT_CLASSES:
+            if path.startswith(prefix):
+                return endpoint
+        return "default"
+
+    @staticmethod
+    def _is_throttled(status: Optional[int], body: Any) -> bool:
+        if status == 429:
+            return True
+        return status in (403, 503) and isinstance(body, str) and any(
+            marker in body for marker in _CHALLENGE_MARKERS
+        )
@@ -0,0 +1,101 @@
+import logging
+import os
+import resource
+from typing import Any, Optional
+
+from celery.signals import task_postrun, task_prerun, worker_init, worker_process_shutdown
+
+from app.services.metrics import clear_process_metrics, mark_process_dead, record_sessions_reaped
+from app.services.scanners.driver_pool import current_driver_pool
+
+logger = logging.getLogger(__name__)
+
+# Set once this process passed WORKER_MAX_SESSIONS; it exits before its next task.
+_recycle = False
+
+
+def resident_memory_mib() -> float:
+    """
+    Current resident memory of the process, or its peak where /proc is not available.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@task_postrun.connect
+def _watch_worker_resources(task_id: Optional[str] = None, task: Any = None, **kwargs: Any) -> None:
+    """
+    After every task, close the WebDriver sessions it leaked, and close the whole pool
+    once the process passes ``WORKER_MAX_RSS_MB`` or ``WORKER_MAX_SESSIONS``. Celery
+    then recycles a process over the memory limit (``CELERYD_MAX_MEMORY_PER_CHILD``);
+    a process over the session limit is recycled by ``_recycle_process``, so the
+    sessions it failed to close lose their heartbeat and get reaped.
+    """
+    global _recycle
+
+    pool = current_driver_pool()
+    if pool is None or task is None:
+        return
+
+    if task_id:
+        leaked = pool.reclaim(task_id)
+        if leaked:
+            record_sessions_reaped("leaked", leaked)
+
+    conf = task.app.conf
+    max_rss = float(conf.get("WORKER_MAX_RSS_MB") or 0)
+    max_sessions = int(conf.get("WORKER_MAX_SESSIONS") or 0)
+    rss = resident_memory_mib()
+    sessions = pool.open_sessions()
+
+    if (max_rss and rss > max_rss) or (max_sessions and sessions > max_sessions):
+        logger.warning(
+            f"Worker process uses {rss:.0f} MiB and {sessions} WebDriver sessions, "
+            f"over the limits ({max_rss:.0f} MiB, {max_sessions} sessions); closing its sessions"
+        )
+        pool.close()
+
+    if max_sessions and sessions > max_sessions:
+        _recycle = True
+
+
+@task_prerun.connect
+def _recycle_process(**kwargs: Any) -> None:
+    """
+    Exit a process flagged by the watchdog before it starts its next task.
+
+    Exiting after the previous task instead would lose its result, which is only sent
+    to the worker once the signal handlers return. The message of the task about to
+    start is requeued (``CELERY_ACKS_LATE`` and ``CELERY_REJECT_ON_WORKER_LOST``) and
+    Celery starts a new process.
+    """
+    if not _recycle:
+        return
+    logger.warning("Worker process is over WORKER_MAX_SESSIONS, exiting to be replaced")
+    _close_driver_pool()
+    mark_process_dead(os.getpid())
+    logging.shutdown()
+    os._exit(0)
+
+
+@worker_process_shutdown.connect
+def _close_driver_pool(**kwargs: Any) -> None:
+    """
+    Quit the sessions of a worker process being recycled or stopped.
+    """
+    pool = current_driver_pool()
+    if pool is not None:
+        pool.close()
+
+
+@worker_init.connect
+def _clear_process_metrics(**kwargs: Any) -> None:
+    clear_process_metrics()
+
+
+@worker_process_shutdown.connect
+def _mark_metrics_process_dead(pid: Optional[int] = None, **kwargs: Any) -> None:
+    mark_process_dead(pid or os.getpid())
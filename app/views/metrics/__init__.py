@@ -0,0 +1,6 @@
+from flask import Blueprint
+
+blueprint = Blueprint(
+    "metrics_blueprint",
+    __name__,
+)
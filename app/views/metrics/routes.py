@@ -0,0 +1,10 @@
+from flask import Response
+
+from app.services.metrics import render_metrics
+from app.views.metrics import blueprint
+
+
+@blueprint.route("/metrics", methods=["GET"])
+def metrics() -> Response:
+    payload, content_type = render_metrics()
+    return Response(payload, content_type=content_type)
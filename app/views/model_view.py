@@ -1,7 +1,41 @@
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, List
 from flask import jsonify, Response
 
 
+def parse_fields(value: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse a ``fields`` query parameter: None when absent, so the whole result is returned.
+    """
+    if value is None:
+        return None
+    return [field.strip() for field in value.split(",") if field.strip() and field.strip() != "state"]
+
+
+def project(value: Any, fields: List[str]) -> Any:
+    """
+    Keep only the given fields of a result, nested fields as dotted paths. Lists are
+    projected item by item.
+
+    :param fields: e.g. ``["id", "address.country"]``
+    """
+    if isinstance(value, list):
+        return [project(item, fields) for item in value]
+    if not isinstance(value, dict):
+        return value
+
+    nested: Dict[str, List[str]] = {}
+    for field in fields:
+        key, _, rest = field.partition(".")
+        if key in value:
+            nested.setdefault(key, [])
+            if rest:
+                nested[key].append(rest)
+    return {
+        key: project(value[key], paths) if paths and key not in fields else value[key]
+        for key, paths in nested.items()
+    }
+
+
 class ModelView:
 
     @staticmethod
@@ -13,8 +47,16 @@ class ModelView:
         return jsonify({"success": False, "error": error})
 
     @staticmethod
-    def message_result(data: Any) -> Dict[str, Any]:
+    def message_result(data: Any, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        :param fields: Result fields to return (see ``project``); an empty list returns
+            only the state, None the whole result.
+        """
+        if fields is not None and not fields:
+            return {"state": data.state}
+        if data.state == "FAILURE":
+            return {"state": data.state, "result": str(data.result)}
         return {
             "state": data.state,
-            "result": data.result if data.state != "FAILURE" else str(data.result),
+            "result": data.result if fields is None else project(data.result, fields),
         }
@@ -0,0 +1,151 @@
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from celery.result import AsyncResult, GroupResult
+from flask import current_app
+
+from app.views.model_view import project
+from app.views.scanner.queues import scan_queue
+from app.views.scanner.settings_provider import Account, validate_inline_account
+from app.views.scanner.tasks import scanner_task
+
+READY_STATES = ("SUCCESS", "FAILURE", "REVOKED")
+FAILED_STATES = ("FAILURE", "REVOKED")
+
+
+def account_label(account: Account) -> str:
+    if isinstance(account, str):
+        return account
+    return account.get("username", "")
+
+
+def validate_accounts(accounts: Any) -> List[Account]:
+    if not isinstance(accounts, list) or not accounts:
+        raise ValueError("accounts must be a non-empty list")
+
+    max_size = int(current_app.config.get("SCANNER_BATCH_MAX_SIZE") or 1000)
+    if len(accounts) > max_size:
+        raise ValueError(f"A batch accepts at most {max_size} accounts")
+
+    for account in accounts:
+        if isinstance(account, str) and account:
+            continue
+        if isinstance(account, dict) and account:
+            validate_inline_account(account)
+            continue
+        raise ValueError("Each account must be a settings reference or a settings object")
+    return accounts
+
+
+def validate_concurrency(concurrency: Any) -> Optional[int]:
+    if concurrency is None:
+        return None
+    if isinstance(concurrency, bool) or not isinstance(concurrency, int) or concurrency < 1:
+        raise ValueError("concurrency must be a positive integer")
+    return concurrency
+
+
+def dispatch_batch(
+        scanner_name: str,
+        accounts: List[Account],
+        concurrency: Optional[int] = None,
+        incremental: Optional[bool] = None,
+        tenant: Optional[str] = None,
+        scan_class: str = "bulk",
+) -> Tuple[str, List[str]]:
+    """
+    Enqueue one scan per account, running at most ``concurrency`` at a time.
+
+    The accounts are split into ``concurrency`` lanes; only the head of each lane is
+    enqueued now and every task enqueues its successor when it finishes, so all task
+    ids are reserved up front and the batch is tracked as one GroupResult.
+
+    A lane only moves on when its running task ends. A task whose worker process is
+    killed is requeued (``CELERY_REJECT_ON_WORKER_LOST``) and carries the rest of the
+    lane with it; if its message is lost altogether, e.g. with that setting off, the
+    remaining accounts of the lane stay pending and have to be submitted again.
+
+    :return: Batch id and the task id of every account, in input order.
+    """
+    max_concurrency = int(current_app.config.get("SCANNER_BATCH_CONCURRENCY") or 8)
+    concurrency = max(1, min(concurrency or max_concurrency, max_concurrency))
+
+    task_ids = [str(uuid4()) for _ in accounts]
+    batch = GroupResult(id=str(uuid4()), results=[AsyncResult(task_id) for task_id in task_ids])
+    batch.save()
+
+    for start in range(min(concurrency, len(accounts))):
+        lane = [[task_ids[i], accounts[i]] for i in range(start, len(accounts), concurrency)]
+        (task_id, account), remaining = lane[0], lane[1:]
+        scanner_task.apply_async(
+            kwargs={
+                "scanner_name": scanner_name,
+                "account": account,
+                "lane": remaining,
+                "incremental": incremental,
+                "tenant": tenant,
+                "scan_class": scan_class,
+            },
+            task_id=task_id,
+            queue=scan_queue(scan_class),
+        )
+
+    return batch.id, task_ids
+
+
+def batch_progress(
+        batch_id: str,
+        include_results: bool = False,
+        offset: int = 0,
+        limit: int = 100,
+        fields: Optional[List[str]] = None,
+) -> Optional[Dict[str, Any]]:
+    batch = GroupResult.restore(batch_id)
+    if batch is None:
+        return None
+
+    task_ids = [result.id for result in batch.results]
+    metas = task_metas(batch.backend, task_ids)
+
+    counts = {"done": 0, "failed": 0, "pending": 0}
+    for meta in metas:
+        if meta["status"] in FAILED_STATES:
+            counts["failed"] += 1
+        elif meta["status"] in READY_STATES:
+            counts["done"] += 1
+        else:
+            counts["pending"] += 1
+
+    progress: Dict[str, Any] = {"batch_id": batch_id, "total": len(task_ids), **counts}
+
+    tasks = []
+    for task_id, meta in list(zip(task_ids, metas))[offset:offset + limit]:
+        task = {"task_id": task_id, "state": meta["status"]}
+        if include_results:
+            result = meta.get("result")
+            if meta["status"] in FAILED_STATES:
+                task["result"] = str(result)
+            elif fields is None or fields:
+                task["result"] = result if fields is None else project(result, fields)
+        tasks.append(task)
+    progress["tasks"] = tasks
+
+    return progress
+
+
+def task_metas(backend: Any, task_ids: List[str]) -> List[Dict[str, Any]]:
+    """
+    Read every task state of the batch, in one round trip on key/value backends.
+    """
+    if hasattr(backend, "mget") and hasattr(backend, "get_key_for_task"):
+        values = backend.mget([backend.get_key_for_task(task_id) for task_id in task_ids])
+        return [
+            backend.decode_result(value) if value else {"status": "PENDING", "result": None}
+            for value in values
+        ]
+
+    metas = []
+    for task_id in task_ids:
+        result = AsyncResult(task_id)
+        metas.append({"status": result.state, "result": result.result})
+    return metas
@@ -0,0 +1,215 @@
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Tuple, cast
+from uuid import uuid4
+
+import redis
+from celery import states
+from celery.result import AsyncResult
+from flask import current_app
+
+from app.services.redis_client import get_redis
+from app.views.scanner.settings_provider import Account
+
+IN_FLIGHT_STATES = (states.PENDING, states.RECEIVED, states.STARTED, states.RETRY)
+RUNNING_STATES = (states.STARTED, states.RETRY)
+
+# Points the key at a new task unless another request already replaced the value the
+# caller saw (compare-and-set); returns the task the key points to afterwards.
+# KEYS: key
+# ARGV: new task id, task id the caller saw ("" if none), ttl
+_CLAIM_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if current and current ~= ARGV[2] then
+  return current
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+return ARGV[1]
+"""
+
+# Deletes the key only if it still points to the given task.
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class ScanInFlight(Exception):
+    """
+    Another task is scanning the same account; retry later and reuse its result.
+    """
+
+    def __init__(self, task_id: str) -> None:
+        super().__init__(f"Task {task_id} is scanning the same account")
+        self.task_id = task_id
+
+    def __reduce__(self) -> Any:
+        return self.__class__, (self.task_id,)
+
+
+def scan_key(scanner_settings: Dict[str, Any], account: Optional[Account] = None) -> str:
+    """
+    Identity of a scan: the username of the scanned account, so references and inline
+    settings of the same account coalesce, plus the scan mode and tenant, since an
+    incremental scan or another tenant's scan does not give the same result.
+
+    :param scanner_settings: Account settings, with the ``incremental`` and ``tenant`` of
+        the request applied.
+    """
+    if scanner_settings.get("username"):
+        identity = str(scanner_settings["username"])
+    elif isinstance(account, str):
+        identity = account
+    else:
+        identity = "default"
+    mode = "incremental" if scanner_settings.get("incremental") else "full"
+    return f"{identity}:{mode}:{scanner_settings.get('tenant') or ''}"
+
+
+class ScanCoalescer:
+    """
+    Latest scan task of each account, so a new request for an account that is already
+    being scanned, or was scanned less than ``freshness`` seconds ago, reuses that task
+    instead of starting another browser.
+
+    :param freshness: Seconds a successful result stays reusable; 0 only coalesces
+        scans that are still in flight.
+    :param ttl: Seconds the latest task of an account is remembered.
+    :param idempotency_ttl: Seconds an ``Idempotency-Key`` keeps pointing to its task.
+    """
+
+    def __init__(
+            self,
+            client: redis.Redis,
+            backend: Any,
+            freshness: float = 300.0,
+            ttl: int = 3600,
+            idempotency_ttl: int = 86400,
+    ) -> None:
+        self._client = client
+        self._backend = backend
+        self._freshness = freshness
+        self._ttl = ttl
+        self._idempotency_ttl = idempotency_ttl
+        self._claim_script = client.register_script(_CLAIM_SCRIPT)
+        self._release_script = client.register_script(_RELEASE_SCRIPT)
+
+    def submit(
+            self,
+            scanner_name: str,
+            account: str,
+            enqueue: Callable[[str], None],
+            idempotency_key: Optional[str] = None,
+    ) -> Tuple[str, bool]:
+        """
+        Enqueue a scan of the account unless an equivalent one can be reused.
+
+        :param enqueue: Called with the id the new task must be enqueued under.
+        :param idempotency_key: Client key; repeated requests with it get the same task.
+        :return: Task id, and whether it is an existing task.
+        """
+        task_id = str(uuid4())
+
+        if idempotency_key:
+            idempotency = self._idempotency_key(scanner_name, idempotency_key)
+            claimed = self._client.set(idempotency, task_id, nx=True, ex=self._idempotency_ttl)
+            if not claimed:
+                return self._get(idempotency) or task_id, True
+
+        latest_key = self._latest_key(scanner_name, account)
+        latest = self._get(latest_key)
+        if latest and self._reusable(latest):
+            self._bind_idempotency(scanner_name, idempotency_key, latest)
+            return latest, True
+
+        winner = str(self._claim_script(keys=[latest_key], args=[task_id, latest or "", self._ttl]))
+        if winner != task_id:
+            self._bind_idempotency(scanner_name, idempotency_key, winner)
+            return winner, True
+
+        try:
+            enqueue(task_id)
+        except Exception:
+            self._release_script(keys=[latest_key], args=[task_id])
+            if idempotency_key:
+                self._release_script(keys=[self._idempotency_key(scanner_name, idempotency_key)], args=[task_id])
+            raise
+        return task_id, False
+
+    def join(self, scanner_name: str, account: str, task_id: str, wait: bool = True) -> Any:
+        """
+        Called by a task before scanning: reuse the fresh result of another scan of the
+        account, or claim the account for this task. Never blocks; the task retries
+        later instead of holding a worker while another scan runs.
+
+        :param wait: False once the task waited long enough; it then scans anyway.
+        :return: Result of the other scan, or None if this task should scan.
+        :raises ScanInFlight: If another task is scanning the account and ``wait`` is set.
+        """
+        latest_key = self._latest_key(scanner_name, account)
+
+        while True:
+            latest = self._get(latest_key)
+            if latest and latest != task_id:
+                result = AsyncResult(latest, backend=self._backend)
+                if result.state == states.SUCCESS and self._is_fresh(result):
+                    return result.result
+                if wait and result.state in RUNNING_STATES:
+                    raise ScanInFlight(latest)
+
+            # Only loops when another task claimed the account in between.
+            winner = str(self._claim_script(keys=[latest_key], args=[task_id, latest or "", self._ttl]))
+            if winner == task_id:
+                return None
+
+    def _get(self, key: str) -> Optional[str]:
+        # The client decodes responses.
+        return cast(Optional[str], self._client.get(key))
+
+    def _reusable(self, task_id: str) -> bool:
+        result = AsyncResult(task_id, backend=self._backend)
+        if result.state in IN_FLIGHT_STATES:
+            return True
+        return result.state == states.SUCCESS and self._is_fresh(result)
+
+    def _is_fresh(self, result: AsyncResult) -> bool:
+        date_done = result.date_done
+        if not self._freshness or date_done is None:
+            return False
+        if isinstance(date_done, str):
+            date_done = datetime.fromisoformat(date_done)
+        if date_done.tzinfo is None:
+            date_done = date_done.replace(tzinfo=timezone.utc)
+        return (datetime.now(timezone.utc) - date_done).total_seconds() <= self._freshness
+
+    def _bind_idempotency(self, scanner_name: str, idempotency_key: Optional[str], task_id: str) -> None:
+        if idempotency_key:
+            self._client.set(
+                self._idempotency_key(scanner_name, idempotency_key), task_id, ex=self._idempotency_ttl
+            )
+
+    @staticmethod
+    def _latest_key(scanner_name: str, account: str) -> str:
+        return f"scan:latest:{scanner_name}:{account}"
+
+    @staticmethod
+    def _idempotency_key(scanner_name: str, key: str) -> str:
+        return f"scan:idempotency:{scanner_name}:{key}"
+
+
+def get_scan_coalescer() -> Optional[ScanCoalescer]:
+    """
+    :return: The coalescer, or None if ``SCAN_COALESCING_ENABLED`` is off.
+    """
+    config = current_app.config
+    if not config.get("SCAN_COALESCING_ENABLED"):
+        return None
+
+    return ScanCoalescer(
+        get_redis(),
+        current_app.extensions["celery"].backend,
+        freshness=float(config.get("SCAN_RESULT_FRESHNESS") or 0),
+        ttl=int(config.get("SCAN_COALESCING_TTL") or 3600),
+        idempotency_ttl=int(config.get("IDEMPOTENCY_KEY_TTL") or 86400),
+    )
@@ -1,5 +1,6 @@
 import json
 from pathlib import Path
+from typing import Any, Dict, Iterable
 
 
 class JSONValidator:
@@ -17,3 +18,17 @@ class JSONValidator:
                 continue
 
         raise Exception("Error decoding JSON files in the directory=[{directory}]!")
+
+    @staticmethod
+    def load_json_file(file_path: Path) -> Any:
+        try:
+            with open(file_path, "r") as file:
+                return json.load(file)
+        except json.JSONDecodeError as err:
+            raise Exception(f"Error decoding JSON file=[{file_path}]: {err}")
+
+    @staticmethod
+    def validate_settings(settings: Dict[str, Any], required: Iterable[str], scanner_name: str) -> None:
+        missing = [key for key in required if not settings.get(key)]
+        if missing:
+            raise Exception(f"Missing settings {missing} for the [{scanner_name}] scanner!")
@@ -0,0 +1,47 @@
+from typing import Any, Dict, Optional
+
+from celery import Celery
+
+# Scan classes and the queue each one is routed to. Every queue is consumed by its own
+# workers, so scans somebody is waiting on never queue behind batch or periodic work.
+SCAN_QUEUES: Dict[str, str] = {
+    "interactive": "interactive",
+    "bulk": "bulk",
+    "scheduled": "scheduled",
+}
+
+
+def validate_scan_class(scan_class: Any, default: str) -> str:
+    """
+    :param scan_class: Class requested by the caller, if any.
+    :param default: Class used when the caller did not pick one.
+    :raises ValueError: If the class is unknown.
+    """
+    if scan_class is None:
+        return default
+    if scan_class not in SCAN_QUEUES:
+        raise ValueError(f"Scan class must be one of: {', '.join(SCAN_QUEUES)}")
+    return scan_class
+
+
+def scan_queue(scan_class: Optional[str]) -> str:
+    return SCAN_QUEUES.get(scan_class or "", SCAN_QUEUES["interactive"])
+
+
+def queue_depths(celery: Celery) -> Dict[str, Optional[int]]:
+    """
+    Messages waiting in the queue of each scan class, not counting the ones already
+    reserved by a worker.
+
+    :return: Depth by scan class, None for a queue that does not exist yet.
+    """
+    depths: Dict[str, Optional[int]] = {}
+    with celery.connection_for_read() as connection:
+        channel = connection.default_channel
+        for scan_class, queue in SCAN_QUEUES.items():
+            try:
+                depths[scan_class] = channel.queue_declare(queue=queue, passive=True).message_count
+            except connection.channel_errors:
+                depths[scan_class] = None
+                channel = connection.channel()
+    return depths
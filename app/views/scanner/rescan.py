@@ -0,0 +1,238 @@
+import hashlib
+import logging
+import random
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, cast
+
+import redis
+from flask import current_app
+
+from app.services.redis_client import get_redis
+from app.services.scanners.incremental import is_unchanged
+
+logger = logging.getLogger(__name__)
+
+# Account of a scanner: None for the scanner's own credentials, or the name of an entry
+# of its ``accounts`` settings.
+ScheduledAccount = Tuple[str, Optional[str]]
+
+
+class RescanScheduler:
+    """
+    Periodic re-scans of every configured account, spread over time.
+
+    Each account first becomes due at a fixed offset (hash slot) within its refresh
+    interval, so accounts are evenly spread instead of all firing at once. After each
+    scan its interval adapts to how often the profile changes: it is halved when the
+    profile changed and grows by half when it did not, within ``min_interval`` and
+    ``max_interval``. Accounts whose scans keep failing back off exponentially.
+    At most ``max_per_tick`` scans are dispatched per tick; the rest wait for the next.
+
+    :param interval: Default refresh interval in seconds, overridden by a
+        ``rescan_interval`` scanner or account setting.
+    :param jitter: Fraction of the interval by which each next due time is randomized.
+    """
+
+    def __init__(
+            self,
+            client: redis.Redis,
+            interval: float = 86400.0,
+            min_interval: float = 21600.0,
+            max_interval: float = 604800.0,
+            max_per_tick: int = 50,
+            jitter: float = 0.1,
+            prefix: str = "rescan",
+    ) -> None:
+        self._client = client
+        self._interval = interval
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._max_per_tick = max_per_tick
+        self._jitter = jitter
+        self._due_key = f"{prefix}:due"
+        self._state_prefix = f"{prefix}:state:"
+        self._lock_key = f"{prefix}:lock"
+
+    def tick(
+            self,
+            configured: Dict[ScheduledAccount, float],
+            dispatch: Callable[[str, Optional[str]], None],
+            period: float = 60.0,
+    ) -> List[ScheduledAccount]:
+        """
+        Register new accounts, drop removed ones and dispatch the scans that are due.
+
+        :param configured: Refresh interval of every account to re-scan.
+        :param dispatch: Enqueues the scan of a scanner account.
+        :param period: Seconds between ticks; a tick runs at most once per period.
+        :return: Accounts dispatched.
+        """
+        now = time.time()
+        lock_key = f"{self._lock_key}:{int(now // period)}"
+        if not self._client.set(lock_key, "1", nx=True, ex=max(1, int(period))):
+            return []
+
+        self._sync(configured, now)
+
+        dispatched = []
+        # The client decodes responses.
+        members = cast(
+            List[str], self._client.zrangebyscore(self._due_key, "-inf", now, start=0, num=self._max_per_tick)
+        )
+        for member in members:
+            scheduled = self._parse(member)
+            state = self._state(member)
+            interval = state.get("interval") or configured[scheduled]
+            # Provisional next run, in case this scan never reports back.
+            self._client.zadd(self._due_key, {member: now + self._backoff(interval, int(state.get("failures", 0)) + 1)})
+            self._client.hset(self._state_key(member), "dispatched_at", now)
+            try:
+                dispatch(*scheduled)
+            except Exception as err:
+                logger.warning(f"Failed to dispatch the re-scan of {member}: {err}")
+                continue
+            dispatched.append(scheduled)
+        return dispatched
+
+    def record(self, scanner_name: str, account: Optional[str], result: Any = None, failed: bool = False) -> None:
+        """
+        Schedule the next re-scan of an account from the outcome of its last one.
+        """
+        member = self._member(scanner_name, account)
+        if self._client.zscore(self._due_key, member) is None:
+            return
+
+        state = self._state(member)
+        base = state.get("base") or self._interval
+        interval = state.get("interval") or base
+        started = state.get("dispatched_at") or time.time()
+
+        if failed:
+            failures = int(state.get("failures", 0)) + 1
+            next_due = started + self._backoff(interval, failures)
+            self._client.hset(self._state_key(member), "failures", failures)
+        else:
+            if _changed(result):
+                interval = max(self._min_interval, interval / 2)
+            else:
+                interval = min(self._max_interval, interval * 1.5)
+            next_due = started + interval * (1 + random.uniform(-self._jitter, self._jitter))
+            self._client.hset(self._state_key(member), mapping={"failures": 0, "interval": interval})
+
+        self._client.zadd(self._due_key, {member: next_due})
+
+    def schedule(self) -> List[Dict[str, Any]]:
+        """
+        :return: Next due time, interval and failure count of every scheduled account.
+        """
+        entries = []
+        members = cast(List[Tuple[str, float]], self._client.zrange(self._due_key, 0, -1, withscores=True))
+        for member, due in members:
+            scanner_name, account = self._parse(member)
+            state = self._state(member)
+            entries.append({
+                "scanner": scanner_name,
+                "account": account,
+                "next_scan_at": due,
+                "interval": state.get("interval") or state.get("base"),
+                "failures": int(state.get("failures", 0)),
+            })
+        return entries
+
+    def _sync(self, configured: Dict[ScheduledAccount, float], now: float) -> None:
+        known = set(cast(List[str], self._client.zrange(self._due_key, 0, -1)))
+        wanted = {self._member(*scheduled): interval for scheduled, interval in configured.items()}
+
+        for member in known - set(wanted):
+            self._client.zrem(self._due_key, member)
+            self._client.delete(self._state_key(member))
+
+        for member, base in wanted.items():
+            state = self._state(member)
+            if member in known and state.get("base") == base:
+                continue
+            # New account, or its configured interval changed: restart from its slot.
+            self._client.hset(self._state_key(member), mapping={"base": base, "interval": base, "failures": 0})
+            self._client.zadd(self._due_key, {member: self._first_due(member, base, now)})
+
+    def _backoff(self, interval: float, failures: int) -> float:
+        if failures <= 0:
+            return interval
+        return min(self._max_interval, interval * 2 ** min(failures, 10))
+
+    @staticmethod
+    def _first_due(member: str, interval: float, now: float) -> float:
+        """
+        Next time at the account's hash slot: a stable offset within the interval.
+        """
+        digest = hashlib.sha1(member.encode("utf-8")).hexdigest()
+        offset = int(digest[:12], 16) % max(1, int(interval))
+        due = now - now % interval + offset
+        return due if due >= now else due + interval
+
+    def _state(self, member: str) -> Dict[str, float]:
+        state = cast(Dict[str, str], self._client.hgetall(self._state_key(member)))
+        return {key: float(value) for key, value in state.items()}
+
+    def _state_key(self, member: str) -> str:
+        return self._state_prefix + member
+
+    @staticmethod
+    def _member(scanner_name: str, account: Optional[str]) -> str:
+        return f"{scanner_name}:{account or ''}"
+
+    @staticmethod
+    def _parse(member: str) -> ScheduledAccount:
+        scanner_name, _, account = member.partition(":")
+        return scanner_name, account or None
+
+
+def _changed(result: Any) -> bool:
+    if is_unchanged(result):
+        return False
+    if isinstance(result, dict) and "diff" in result:
+        return bool(result["diff"])
+    return True
+
+
+def configured_accounts(
+        scanner_settings: Dict[str, Dict[str, Any]], scanner_names: Iterable[str], default_interval: float
+) -> Dict[ScheduledAccount, float]:
+    """
+    Accounts to re-scan: the scanner's own credentials and each entry of its
+    ``accounts`` settings, unless ``"rescan": false`` is set on the scanner or account.
+
+    :return: Refresh interval of each account, from its ``rescan_interval`` setting.
+    """
+    configured: Dict[ScheduledAccount, float] = {}
+    for scanner_name in scanner_names:
+        settings = scanner_settings.get(scanner_name)
+        if not isinstance(settings, dict) or settings.get("rescan") is False:
+            continue
+        interval = float(settings.get("rescan_interval") or default_interval)
+
+        if settings.get("username"):
+            configured[(scanner_name, None)] = interval
+        for name, account in (settings.get("accounts") or {}).items():
+            if isinstance(account, dict) and account.get("rescan") is False:
+                continue
+            account_interval = account.get("rescan_interval") if isinstance(account, dict) else None
+            configured[(scanner_name, name)] = float(account_interval or interval)
+    return configured
+
+
+def get_rescan_scheduler() -> Optional[RescanScheduler]:
+    """
+    :return: The re-scan scheduler, or None if ``RESCAN_ENABLED`` is off.
+    """
+    config = current_app.config
+    if not config.get("RESCAN_ENABLED"):
+        return None
+
+    return RescanScheduler(
+        get_redis(),
+        interval=float(config.get("RESCAN_INTERVAL") or 86400),
+        min_interval=float(config.get("RESCAN_MIN_INTERVAL") or 21600),
+        max_interval=float(config.get("RESCAN_MAX_INTERVAL") or 604800),
+        max_per_tick=int(config.get("RESCAN_MAX_PER_TICK") or 50),
+    )
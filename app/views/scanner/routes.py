@@ -1,22 +1,151 @@
+from pathlib import Path
 from typing import Tuple, Any
-from flask import Response, url_for
+from flask import Response, current_app, request, stream_with_context, url_for
 from app.views.scanner import blueprint
-from app.views.model_view import ModelView
+from app.views.model_view import ModelView, parse_fields
 from app.views.scanner.tasks import scanner_task
+from app.views.scanner.batch import (
+    account_label,
+    batch_progress,
+    dispatch_batch,
+    validate_accounts,
+    validate_concurrency,
+)
+from app.views.scanner.status_stream import stream_slots, stream_task_status, validate_task_ids
+from app.views.scanner.coalescing import get_scan_coalescer, scan_key
+from app.views.scanner.queues import queue_depths, scan_queue, validate_scan_class
+from app.views.scanner.rescan import get_rescan_scheduler
+from app.views.scanner.settings_provider import settings_provider, validate_inline_account
+from app.services.scanners.grid_scheduler import get_grid_scheduler
+from app.services.scanners.registry import scanner_registry
 from celery.result import AsyncResult
 
 
 @blueprint.route("/<name>", methods=["POST"])
 def scanner(name: str) -> Tuple[Response, int]:
+    if name not in scanner_registry:
+        return ModelView.error(error="Scanner not found!"), 404
+
+    payload = request.get_json(silent=True) or {}
+    try:
+        scan_class = validate_scan_class(payload.get("scan_class"), "interactive")
+        if not isinstance(payload.get("account"), str):
+            validate_inline_account(payload.get("account"))
+    except ValueError as e:
+        return ModelView.error(error=str(e)), 400
+
+    try:
+        kwargs = {
+            "scanner_name": name,
+            "account": payload.get("account"),
+            "incremental": payload.get("incremental"),
+            "tenant": payload.get("tenant"),
+            "scan_class": scan_class,
+        }
+        queue = scan_queue(scan_class)
+
+        coalescer = get_scan_coalescer()
+        if coalescer is None or payload.get("force"):
+            task_id, coalesced = scanner_task.apply_async(kwargs=kwargs, queue=queue).task_id, False
+        else:
+            scanner_settings = settings_provider.get(
+                Path(current_app.config["SCANNER_SETTINGS"]), name, payload.get("account")
+            )
+            # The same overrides the task applies, so only equivalent scans coalesce.
+            for key in ("incremental", "tenant"):
+                if kwargs[key] is not None:
+                    scanner_settings[key] = kwargs[key]
+            task_id, coalesced = coalescer.submit(
+                name,
+                scan_key(scanner_settings, payload.get("account")),
+                lambda new_task_id: scanner_task.apply_async(kwargs=kwargs, task_id=new_task_id, queue=queue),
+                idempotency_key=request.headers.get("Idempotency-Key"),
+            )
+
+        result = AsyncResult(task_id)
+        status_url = url_for('scanner_blueprint.scanner_status', message_id=task_id, _external=True)
+        data = {
+            'state': result.state,
+            'task_id': task_id,
+            'url': status_url,
+            'coalesced': coalesced,
+        }
+        if coalesced and result.state == "SUCCESS":
+            data['result'] = result.result
+        return ModelView.success(data=data), 200
+    except Exception as e:
+        return ModelView.error(error=str(e)), 500
+
+
+@blueprint.route("/status/stream", methods=["GET"])
+def scanner_status_stream() -> Any:
+    try:
+        task_ids = validate_task_ids(
+            request.args.get("ids"), int(current_app.config.get("SCANNER_BATCH_MAX_SIZE") or 1000)
+        )
+    except ValueError as e:
+        return ModelView.error(error=str(e)), 400
+
+    if not stream_slots.acquire(int(current_app.config.get("STATUS_STREAM_MAX") or 0)):
+        response = ModelView.error(error="Too many status streams are open, poll the status endpoint instead")
+        response.headers["Retry-After"] = "5"
+        return response, 503
+
+    events = stream_task_status(
+        current_app.extensions["celery"].backend,
+        task_ids,
+        heartbeat=float(current_app.config.get("STATUS_STREAM_HEARTBEAT") or 15),
+        timeout=float(current_app.config.get("STATUS_STREAM_TIMEOUT") or 300),
+    )
+    response = Response(
+        stream_with_context(events),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # Runs when the server closes the response, whether the stream ended or the client left.
+    response.call_on_close(stream_slots.release)
+    return response
+
+
+@blueprint.route("/status/<message_id>", methods=["GET"])
+def scanner_status(message_id: str) -> tuple[dict[str, Any], int]:
+    result = AsyncResult(message_id)
+
+    return ModelView.message_result(data=result, fields=parse_fields(request.args.get("fields"))), 200
+
+
+@blueprint.route("/<name>/batch", methods=["POST"])
+def scanner_batch(name: str) -> Tuple[Response, int]:
+    if name not in scanner_registry:
+        return ModelView.error(error="Scanner not found!"), 404
+
+    payload = request.get_json(silent=True) or {}
     try:
-        result = scanner_task.delay(scanner_name=name)
-        status_url = url_for('scanner_blueprint.scanner_status', message_id=result.task_id, _external=True)
+        accounts = validate_accounts(payload.get("accounts"))
+        concurrency = validate_concurrency(payload.get("concurrency"))
+        scan_class = validate_scan_class(payload.get("scan_class"), "bulk")
+    except ValueError as e:
+        return ModelView.error(error=str(e)), 400
+
+    try:
+        batch_id, task_ids = dispatch_batch(
+            name,
+            accounts,
+            concurrency,
+            payload.get("incremental"),
+            payload.get("tenant"),
+            scan_class,
+        )
+        status_url = url_for('scanner_blueprint.scanner_batch_status', batch_id=batch_id, _external=True)
         return (
             ModelView.success(
                 data={
-                    'state': result.state,
-                    'task_id': result.task_id,
-                    'url': status_url
+                    'batch_id': batch_id,
+                    'url': status_url,
+                    'tasks': [
+                        {'account': account_label(account), 'task_id': task_id}
+                        for account, task_id in zip(accounts, task_ids)
+                    ],
                 }
             ),
             200,
@@ -25,8 +154,48 @@ def scanner(name: str) -> Tuple[Response, int]:
         return ModelView.error(error=str(e)), 500
 
 
-@blueprint.route("/status/<message_id>", methods=["GET"])
-def scanner_status(message_id: str) -> tuple[dict[str, Any], int]:
-    result = AsyncResult(message_id)
+@blueprint.route("/batch/<batch_id>", methods=["GET"])
+def scanner_batch_status(batch_id: str) -> Tuple[Response, int]:
+    progress = batch_progress(
+        batch_id,
+        include_results=request.args.get("results", "false").lower() == "true",
+        fields=parse_fields(request.args.get("fields")),
+        offset=request.args.get("offset", 0, type=int),
+        limit=request.args.get("limit", 100, type=int),
+    )
+    if progress is None:
+        return ModelView.error(error="Batch not found!"), 404
 
-    return ModelView.message_result(data=result), 200
+    return ModelView.success(data=progress), 200
+
+
+@blueprint.route("/grid", methods=["GET"])
+def scanner_grid() -> Tuple[Response, int]:
+    scheduler = get_grid_scheduler()
+    if scheduler is None:
+        return ModelView.success(data={"enabled": False}), 200
+
+    try:
+        return ModelView.success(data={"enabled": True, **scheduler.stats()}), 200
+    except Exception as e:
+        return ModelView.error(error=str(e)), 500
+
+
+@blueprint.route("/queues", methods=["GET"])
+def scanner_queues() -> Tuple[Response, int]:
+    try:
+        return ModelView.success(data={"depth": queue_depths(current_app.extensions["celery"])}), 200
+    except Exception as e:
+        return ModelView.error(error=str(e)), 500
+
+
+@blueprint.route("/rescan", methods=["GET"])
+def scanner_rescan_schedule() -> Tuple[Response, int]:
+    scheduler = get_rescan_scheduler()
+    if scheduler is None:
+        return ModelView.success(data={"enabled": False}), 200
+
+    try:
+        return ModelView.success(data={"enabled": True, "accounts": scheduler.schedule()}), 200
+    except Exception as e:
+        return ModelView.error(error=str(e)), 500
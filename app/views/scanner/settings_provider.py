@@ -0,0 +1,126 @@
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+from app.views.scanner.json_validator import JSONValidator
+
+logger = logging.getLogger(__name__)
+
+Account = Union[str, Dict[str, str]]
+
+# Settings an account given inline in a request may set; anything else, e.g. the url
+# credentials are posted to, only comes from the settings files.
+INLINE_ACCOUNT_KEYS = ("username", "password")
+
+
+class ScannerSettingsProvider:
+    """
+    Merged scanner settings of every JSON object file in the settings directory.
+
+    Files are parsed once per worker and only re-parsed when their mtime or size
+    changes. Files holding a JSON list (records saved by JSONRepository) are skipped.
+    """
+
+    def __init__(self) -> None:
+        self._files: Dict[Path, Tuple[Tuple[int, int], Any]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, directory: Path) -> Dict[str, Dict[str, Any]]:
+        file_paths = sorted(directory.glob("*.json"))
+        if not file_paths:
+            raise Exception(f"No JSON file found in the directory=[{directory}]!")
+
+        merged: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for file_path in file_paths:
+                data = self._read(file_path)
+                if not isinstance(data, dict):
+                    continue
+                for scanner_name, scanner_settings in data.items():
+                    _merge_scanner_settings(merged.setdefault(scanner_name, {}), scanner_settings)
+
+            for file_path in set(self._files) - set(file_paths):
+                del self._files[file_path]
+
+        return merged
+
+    def get(
+            self,
+            directory: Path,
+            scanner_name: str,
+            account: Optional[Account] = None,
+            required: Iterable[str] = (),
+    ) -> Dict[str, Any]:
+        """
+        Resolve the settings of one scanner account and check they are complete.
+
+        :param directory: Scanner settings directory.
+        :param scanner_name: Name of the scanner block.
+        :param account: None for the scanner's own credentials, the name of an entry of
+            its ``accounts`` settings, or inline credentials (``INLINE_ACCOUNT_KEYS``),
+            which never inherit the configured password.
+        :param required: Keys the scanner cannot run without.
+        :return: Settings of the account.
+        """
+        scanner_settings = dict(self.load(directory).get(scanner_name, {}))
+        accounts = scanner_settings.pop("accounts", {})
+
+        overrides: Optional[Dict[str, str]]
+        if isinstance(account, str):
+            if account not in accounts:
+                raise Exception(f"Account [{account}] not found in the [{scanner_name}] settings!")
+            overrides = accounts[account]
+        else:
+            overrides = validate_inline_account(account)
+            if overrides:
+                scanner_settings.pop("password", None)
+
+        if overrides:
+            scanner_settings = {**scanner_settings, **overrides}
+
+        JSONValidator.validate_settings(scanner_settings, required, scanner_name)
+        return scanner_settings
+
+    def _read(self, file_path: Path) -> Any:
+        stat = file_path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        cached = self._files.get(file_path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        data = JSONValidator.load_json_file(file_path)
+        self._files[file_path] = (signature, data)
+        logger.info(f"Loaded scanner settings from {file_path}")
+        return data
+
+
+def validate_inline_account(account: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+    """
+    :raises ValueError: If an inline account sets anything but ``INLINE_ACCOUNT_KEYS``.
+    """
+    if not account:
+        return account
+    if not isinstance(account, dict):
+        raise ValueError("An account must be a settings reference or a settings object")
+    unknown = sorted(set(account) - set(INLINE_ACCOUNT_KEYS))
+    if unknown:
+        raise ValueError(
+            f"Inline accounts may only set {', '.join(INLINE_ACCOUNT_KEYS)}, got [{', '.join(unknown)}]"
+        )
+    return account
+
+
+def _merge_scanner_settings(target: Dict[str, Any], source: Any) -> None:
+    if not isinstance(source, dict):
+        raise Exception(f"Scanner settings must be JSON objects, got [{type(source).__name__}]!")
+
+    for key, value in source.items():
+        if key == "accounts" and isinstance(value, dict):
+            target.setdefault("accounts", {}).update(value)
+        else:
+            target[key] = value
+
+
+settings_provider = ScannerSettingsProvider()
@@ -0,0 +1,167 @@
+import json
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.views.scanner.batch import FAILED_STATES, READY_STATES, task_metas
+
+
+def validate_task_ids(ids: Optional[str], max_size: int) -> List[str]:
+    task_ids = list(dict.fromkeys(task_id.strip() for task_id in (ids or "").split(",") if task_id.strip()))
+    if not task_ids:
+        raise ValueError("ids must list at least one task id")
+    if len(task_ids) > max_size:
+        raise ValueError(f"A stream watches at most {max_size} tasks")
+    return task_ids
+
+
+class StreamSlots:
+    """
+    Concurrent status streams of this process. Each open stream holds a server thread,
+    so streams are capped to leave threads for the rest of the API.
+    """
+
+    def __init__(self) -> None:
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, limit: int) -> bool:
+        """
+        :param limit: Streams allowed at once; 0 for no limit.
+        :return: False if ``limit`` streams are already open.
+        """
+        with self._lock:
+            if limit and self._active >= limit:
+                return False
+            self._active += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._active = max(0, self._active - 1)
+
+
+stream_slots = StreamSlots()
+
+
+def stream_task_status(
+        backend: Any,
+        task_ids: List[str],
+        heartbeat: float = 15.0,
+        timeout: float = 300.0,
+        poll_interval: float = 1.0,
+) -> Iterator[str]:
+    """
+    Server-Sent Events with the state of each task, sent once on connect and again on
+    every change, until all tasks are ready or ``timeout`` seconds have passed.
+
+    On the Redis result backend the stream subscribes to the channels the backend
+    publishes every state to; other backends are polled every ``poll_interval`` seconds
+    in a single read for all tasks.
+
+    :param backend: Celery result backend.
+    :param task_ids: Tasks to watch.
+    :param heartbeat: Seconds between keep-alive comments when nothing changes.
+    :param timeout: Seconds before the stream is closed; clients reconnect and get the
+        current states again.
+    """
+    deadline = time.monotonic() + timeout
+    yield "retry: 3000\n\n"
+
+    if _supports_pubsub(backend):
+        events = _watch_pubsub(backend, task_ids, heartbeat, deadline)
+    else:
+        events = _watch_polling(backend, task_ids, heartbeat, deadline, poll_interval)
+
+    for event in events:
+        yield event
+    yield _event("end", {"task_ids": task_ids})
+
+
+def _watch_pubsub(backend: Any, task_ids: List[str], heartbeat: float, deadline: float) -> Iterator[str]:
+    channels = {_channel(backend, task_id): task_id for task_id in task_ids}
+    pubsub = backend.client.pubsub(ignore_subscribe_messages=True)
+    # Subscribe before reading the current states so no change falls in between.
+    pubsub.subscribe(*channels)
+    try:
+        pending = set(task_ids)
+        for task_id, meta in zip(task_ids, task_metas(backend, task_ids)):
+            yield _status_event(task_id, meta)
+            if meta["status"] in READY_STATES:
+                pending.discard(task_id)
+                pubsub.unsubscribe(_channel(backend, task_id))
+
+        last_sent = time.monotonic()
+        while pending and time.monotonic() < deadline:
+            message = pubsub.get_message(timeout=min(heartbeat, max(0.0, deadline - time.monotonic())))
+            if message is None or message["type"] != "message":
+                if time.monotonic() - last_sent >= heartbeat:
+                    yield ": keep-alive\n\n"
+                    last_sent = time.monotonic()
+                continue
+
+            changed = channels.get(_decode(message["channel"]))
+            if changed is None or changed not in pending:
+                continue
+
+            meta = backend.decode_result(message["data"])
+            yield _status_event(changed, meta)
+            last_sent = time.monotonic()
+            if meta["status"] in READY_STATES:
+                pending.discard(changed)
+    finally:
+        pubsub.close()
+
+
+def _watch_polling(
+        backend: Any, task_ids: List[str], heartbeat: float, deadline: float, poll_interval: float
+) -> Iterator[str]:
+    states: Dict[str, str] = {}
+    pending = list(task_ids)
+    last_sent = time.monotonic()
+
+    while pending:
+        for task_id, meta in zip(pending, task_metas(backend, pending)):
+            if states.get(task_id) != meta["status"]:
+                states[task_id] = meta["status"]
+                yield _status_event(task_id, meta)
+                last_sent = time.monotonic()
+        pending = [task_id for task_id in pending if states[task_id] not in READY_STATES]
+
+        if not pending or time.monotonic() >= deadline:
+            return
+        if time.monotonic() - last_sent >= heartbeat:
+            yield ": keep-alive\n\n"
+            last_sent = time.monotonic()
+        time.sleep(poll_interval)
+
+
+def _channel(backend: Any, task_id: str) -> str:
+    """
+    The Redis backend publishes each state on the channel named after the task's key.
+    """
+    return _decode(backend.get_key_for_task(task_id))
+
+
+def _decode(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _supports_pubsub(backend: Any) -> bool:
+    return hasattr(backend, "client") and hasattr(backend.client, "pubsub") and hasattr(backend, "get_key_for_task")
+
+
+def _status_event(task_id: str, meta: Dict[str, Any]) -> str:
+    result = meta.get("result")
+    return _event(
+        "status",
+        {
+            "task_id": task_id,
+            "state": meta["status"],
+            "result": str(result) if meta["status"] in FAILED_STATES else result,
+        },
+    )
+
+
+def _event(name: str, data: Dict[str, Any]) -> str:
+    return f"event: {name}\ndata: {json.dumps(data, default=str)}\n\n"
@@ -1,56 +1,294 @@
+import math
+import time
+from datetime import datetime
 from pathlib import Path
 from flask import current_app as flask_app
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 
+from app.repository.factory import get_repository
+from app.services.metrics import observe_queue_wait, observe_task, record_sessions_reaped
+from app.services.rate_limiter import RateLimitExceeded
+from app.services.scanners.checkpoint import get_scan_checkpoint
+from app.services.scanners.registry import scanner_registry
 from app.services.scanners.scanner_creator import ScannerCreator
-from app.services.scanners.upwork.creator import UpworkCreator
 from app.services.scanners.service import ScannerService
-from app.views.scanner.json_validator import JSONValidator
+from app.services.scanners.grid_scheduler import get_grid_scheduler
+from app.services.scanners.session_registry import SessionEntry, delete_hub_session, get_session_registry
+from app.views.scanner.coalescing import ScanInFlight, get_scan_coalescer, scan_key
+from app.views.scanner.queues import scan_queue
+from app.views.scanner.rescan import configured_accounts, get_rescan_scheduler
+from app.views.scanner.settings_provider import Account, settings_provider
 from celery import shared_task
+from celery.signals import before_task_publish
 from celery.utils.log import get_task_logger
 
 logger = get_task_logger(__name__)
 
-_scanner_selector: Dict[str, ScannerCreator] = {
-    "upwork": UpworkCreator(),
+# Seconds before the first retry, by the scan stage that failed; doubled on each further
+# retry. A dropped request is worth retrying soon, a failed login or a full grid is not.
+_RETRY_COUNTDOWNS: Dict[str, int] = {
+    "driver_acquire": 30,
+    "home_page": 15,
+    "login": 60,
+    "restore_session": 10,
+    "ciphertext": 10,
+    "profile_details": 5,
 }
+_DEFAULT_RETRY_COUNTDOWN = 5
+# Seconds between checks on a concurrent scan of the same account.
+_COALESCING_RETRY_COUNTDOWN = 5
 
 
 @shared_task(bind=True, max_retries=3)
-def scanner_task(self, scanner_name: Optional[str] = None, *args: Any, **kwargs: Any) -> Any:
+def scanner_task(
+        self,
+        scanner_name: Optional[str] = None,
+        account: Optional[Account] = None,
+        lane: Optional[List[List[Any]]] = None,
+        incremental: Optional[bool] = None,
+        tenant: Optional[str] = None,
+        scan_class: Optional[str] = None,
+        coalesce_until: Optional[float] = None,
+        coalesce_waits: int = 0,
+        *args: Any,
+        **kwargs: Any,
+) -> Any:
     logger.info(f"Task {self.name} started with scanner_name: {scanner_name}")
+    scanner_label = scanner_name or "unknown"
+    observe_queue_wait(
+        scanner_label, self.request.get("enqueued_at"), _eta_timestamp(self.request.eta), scan_queue(scan_class)
+    )
+    # Retries spent waiting for a concurrent scan do not count as failures.
+    failures = self.request.retries - coalesce_waits
+    started = time.perf_counter()
     try:
-        return _run(scanner_name)
+        result = _run(
+            scanner_name,
+            account,
+            incremental,
+            task_id=self.request.id,
+            tenant=tenant,
+            coalesce=coalesce_until is None or time.time() < coalesce_until,
+        )
+    except ScanInFlight as busy:
+        # Check again later instead of holding the worker while the other scan runs.
+        logger.info(f"Task {self.name} waits for {busy.task_id}, which is scanning the same account")
+        until = coalesce_until or time.time() + float(flask_app.config.get("SCAN_COALESCING_WAIT") or 300)
+        raise self.retry(
+            countdown=_COALESCING_RETRY_COUNTDOWN,
+            kwargs={**self.request.kwargs, "coalesce_until": until, "coalesce_waits": coalesce_waits + 1},
+            max_retries=None,
+        )
     except Exception as e:
         logger.exception(f"Exception in task {self.name}: {e}")
-        raise self.retry(exc=e, countdown=5)
+        if failures >= self.max_retries:
+            observe_task(scanner_label, "failure", time.perf_counter() - started)
+            _discard_checkpoint(scanner_name, self.request.id)
+            _record_rescan(scan_class, scanner_name, account, failed=True)
+            _dispatch_next_in_lane(scanner_name, lane, incremental, tenant, scan_class)
+        else:
+            observe_task(scanner_label, "retry", time.perf_counter() - started)
+        raise self.retry(
+            exc=e, countdown=_retry_countdown(e, failures), max_retries=self.max_retries + coalesce_waits
+        )
     finally:
         logger.info(f"Task {self.name} ended")
 
+    observe_task(scanner_label, "success", time.perf_counter() - started)
+    _discard_checkpoint(scanner_name, self.request.id)
+    _record_rescan(scan_class, scanner_name, account, result)
+    _dispatch_next_in_lane(scanner_name, lane, incremental, tenant, scan_class)
+    return result
 
-def _run(scanner_name: Optional[str] = None) -> list:
+
+@shared_task
+def rescan_due_accounts() -> int:
+    """
+    Beat task: enqueue the periodic re-scans that are due.
+
+    :return: Number of scans dispatched.
+    """
+    scheduler = get_rescan_scheduler()
+    if scheduler is None:
+        return 0
+
+    configured = configured_accounts(
+        settings_provider.load(Path(flask_app.config['SCANNER_SETTINGS'])),
+        scanner_registry.names(),
+        float(flask_app.config.get("RESCAN_INTERVAL") or 86400),
+    )
+
+    def dispatch(scanner_name: str, account: Optional[str]) -> None:
+        scanner_task.apply_async(
+            kwargs={
+                "scanner_name": scanner_name,
+                "account": account,
+                "incremental": True,
+                "scan_class": "scheduled",
+            },
+            queue=scan_queue("scheduled"),
+        )
+
+    dispatched = scheduler.tick(configured, dispatch, period=float(flask_app.config.get("RESCAN_TICK") or 60))
+    if dispatched:
+        logger.info(f"Dispatched {len(dispatched)} periodic re-scans")
+    return len(dispatched)
+
+
+@before_task_publish.connect
+def _stamp_enqueued_at(headers: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+    """
+    Record when each task message is published, to measure its wait in the queue.
+    """
+    if headers is not None:
+        headers["enqueued_at"] = time.time()
+
+
+def _eta_timestamp(eta: Optional[str]) -> Optional[float]:
+    if not eta:
+        return None
+    try:
+        return datetime.fromisoformat(eta).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _run(
+        scanner_name: Optional[str] = None,
+        account: Optional[Account] = None,
+        incremental: Optional[bool] = None,
+        task_id: Optional[str] = None,
+        tenant: Optional[str] = None,
+        coalesce: bool = True,
+) -> Any:
+    """
+    :param coalesce: Wait for a concurrent scan of the same account rather than scan too.
+    :raises ScanInFlight: If another task is scanning the account and ``coalesce`` is set.
+    """
     if scanner_name is None:
         raise ValueError("scanner_name must be provided")
 
     scanner_creator = _select_scanner(scanner_name)
-    scanner_settings = _load_scanner_settings(scanner_name)
+    scanner_settings = _load_scanner_settings(scanner_name, account, scanner_creator.required_settings)
+    if incremental is not None:
+        scanner_settings["incremental"] = incremental
+    if tenant is not None:
+        scanner_settings["tenant"] = tenant
 
-    scanner_service = ScannerService(scanner_creator)
+    if task_id is not None:
+        scanner_settings["checkpoint_key"] = task_id
+
+        coalescer = get_scan_coalescer()
+        if coalescer is not None:
+            # Another task may already be scanning this account, e.g. a duplicate in a batch.
+            shared_result = coalescer.join(scanner_name, scan_key(scanner_settings, account), task_id, wait=coalesce)
+            if shared_result is not None:
+                logger.info("Reusing the result of a concurrent scan of the same account")
+                return shared_result
+
+    scanner_service = ScannerService(scanner_creator, get_repository())
 
     return scanner_service.boot(scanner_settings)
 
 
-def _select_scanner(scanner_name: str) -> ScannerCreator:
+def _retry_countdown(error: Exception, retries: int) -> int:
+    if isinstance(error, RateLimitExceeded):
+        # Retry when the token the request would have waited for is due.
+        return max(1, math.ceil(error.wait))
+    stage = getattr(error, "stage", None)
+    return _RETRY_COUNTDOWNS.get(stage or "", _DEFAULT_RETRY_COUNTDOWN) * 2 ** retries
+
+
+def _discard_checkpoint(scanner_name: Optional[str], task_id: Optional[str]) -> None:
+    """
+    Drop the intermediate results of a scan once its task will not run again.
+    """
+    if scanner_name and task_id:
+        get_scan_checkpoint(scanner_name, task_id).discard()
+
+
+@shared_task
+def reap_orphaned_sessions() -> int:
+    """
+    Beat task: close the WebDriver sessions left on the hub by dead worker processes
+    and give their grid slots back.
+
+    :return: Number of sessions closed.
+    """
+    registry = get_session_registry()
+    if registry is None:
+        return 0
+    scheduler = get_grid_scheduler()
+
+    def close(session_id: str, entry: SessionEntry) -> None:
+        delete_hub_session(session_id, entry)
+        if scheduler is not None and entry.get("lease"):
+            scheduler.release(entry["lease"])
+
+    reaped = registry.reap(close)
+    if reaped:
+        logger.warning(f"Closed {len(reaped)} orphaned WebDriver sessions: {', '.join(reaped)}")
+        record_sessions_reaped("orphaned", len(reaped))
+    return len(reaped)
+
+
+def _record_rescan(
+        scan_class: Optional[str],
+        scanner_name: Optional[str],
+        account: Optional[Account],
+        result: Any = None,
+        failed: bool = False,
+) -> None:
+    """
+    Report the outcome of a periodic re-scan so the scheduler can plan the next one.
+    """
+    if scan_class != "scheduled" or not scanner_name or isinstance(account, dict):
+        return
+    scheduler = get_rescan_scheduler()
+    if scheduler is None:
+        return
     try:
-        return _scanner_selector[scanner_name]
-    except KeyError:
-        raise Exception("Scanner not found!")
+        scheduler.record(scanner_name, account, result, failed=failed)
+    except Exception as err:
+        logger.warning(f"Failed to record the re-scan outcome of {scanner_name}: {err}")
 
 
-def _load_scanner_settings(scanner_name: str) -> dict:
-    scanner_settings_directory = Path(flask_app.config['SCANNER_SETTINGS'])
+def _dispatch_next_in_lane(
+        scanner_name: Optional[str],
+        lane: Optional[List[List[Any]]],
+        incremental: Optional[bool] = None,
+        tenant: Optional[str] = None,
+        scan_class: Optional[str] = None,
+) -> None:
+    """
+    Batch scans run as lanes of sequential tasks; each finished task enqueues the
+    next account of its lane under the task id reserved when the batch was created.
+    """
+    if not lane:
+        return
+
+    (task_id, account), remaining = lane[0], lane[1:]
+    scanner_task.apply_async(
+        kwargs={
+            "scanner_name": scanner_name,
+            "account": account,
+            "lane": remaining,
+            "incremental": incremental,
+            "tenant": tenant,
+            "scan_class": scan_class,
+        },
+        task_id=task_id,
+        queue=scan_queue(scan_class),
+    )
 
-    settings = JSONValidator.load_json_from_directory(scanner_settings_directory)
-    scanner_settings = settings.get(scanner_name, {})
 
-    return scanner_settings
+def _select_scanner(scanner_name: str) -> ScannerCreator:
+    return scanner_registry.get(scanner_name)
+
+
+def _load_scanner_settings(
+        scanner_name: str, account: Optional[Account] = None, required: Tuple[str, ...] = ()
+) -> dict:
+    scanner_settings_directory = Path(flask_app.config['SCANNER_SETTINGS'])
+
+    return settings_provider.get(scanner_settings_directory, scanner_name, account, required)
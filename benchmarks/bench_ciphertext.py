@@ -0,0 +1,70 @@
+"""
+Micro-benchmark of the ciphertext extractors against saved best matches pages.
+
+Usage: python -m benchmarks.bench_ciphertext [page.html ...] [--rounds N]
+
+Without arguments every ``benchmarks/fixtures/*.html`` page is used.
+"""
+import argparse
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from app.services.scanners.upwork.ciphertext import (
+    _find_profile_href,
+    _find_profile_href_with_soup,
+)
+
+FIXTURES_DIRECTORY = Path(__file__).parent / "fixtures"
+
+EXTRACTORS: Dict[str, Callable[[str], Optional[str]]] = {
+    "streaming": _find_profile_href,
+    "beautifulsoup": _find_profile_href_with_soup,
+}
+
+
+def measure(extractor: Callable[[str], Optional[str]], html: str, rounds: int) -> Dict[str, float]:
+    extractor(html)
+
+    started = time.process_time()
+    for _ in range(rounds):
+        extractor(html)
+    cpu_ms = (time.process_time() - started) * 1000 / rounds
+
+    tracemalloc.start()
+    extractor(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"cpu_ms": cpu_ms, "peak_kib": peak / 1024}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pages", nargs="*", type=Path)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    pages = args.pages or sorted(FIXTURES_DIRECTORY.glob("*.html"))
+    for page in pages:
+        html = page.read_text(encoding="utf-8")
+        print(f"{page.name} ({len(html) / 1024:.0f} KiB)")
+
+        results = {name: measure(extractor, html, args.rounds) for name, extractor in EXTRACTORS.items()}
+        for name, result in results.items():
+            href = EXTRACTORS[name](html)
+            print(
+                f"  {name:<14} {result['cpu_ms']:9.2f} ms/page  "
+                f"{result['peak_kib']:10.0f} KiB peak  href={href}"
+            )
+
+        baseline, fast = results["beautifulsoup"], results["streaming"]
+        print(
+            f"  speedup {baseline['cpu_ms'] / max(fast['cpu_ms'], 1e-9):.1f}x cpu, "
+            f"{baseline['peak_kib'] / max(fast['peak_kib'], 1e-9):.1f}x memory"
+        )
+
+
+if __name__ == "__main__":
+    main()
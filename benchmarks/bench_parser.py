@@ -0,0 +1,84 @@
+"""
+Records per second of the profile parsers on synthetic copies of a saved
+profile-details payload.
+
+Usage: python -m benchmarks.bench_parser [--records N] [--processes N]
+"""
+import argparse
+import copy
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from app.services.scanners.upwork import parser as profile_parser
+from app.services.scanners.upwork.parser import parse_profile, parse_profiles
+
+FIXTURE = Path(__file__).parent / "fixtures" / "profile_details.json"
+
+
+def make_payloads(count: int) -> Iterator[Dict]:
+    template = json.loads(FIXTURE.read_text())
+    for i in range(count):
+        payload = copy.deepcopy(template)
+        payload["profile"]["identity"]["ciphertext"] = f"~01{i:016x}"
+        payload["profile"]["identity"]["uid"] = str(10 ** 18 + i)
+        # A realistic spread of repeated dates.
+        payload["person"]["updatedOn"] = f"2024-05-{1 + i % 28:02d}T08:15:00"
+        yield payload
+
+
+@contextmanager
+def unmemoized_dates() -> Iterator[None]:
+    """
+    Validate every date from scratch, as the parser did before dates were memoized.
+    """
+    memoized = profile_parser._normalize_date
+    profile_parser._normalize_date = memoized.__wrapped__  # type: ignore[assignment]
+    try:
+        yield
+    finally:
+        profile_parser._normalize_date = memoized
+
+
+def parse_original(items: List[Dict]) -> int:
+    with unmemoized_dates():
+        return sum(1 for _ in map(parse_profile, items))
+
+
+def run(name: str, parse: Callable[[List[Dict]], int], payloads: List[Dict]) -> None:
+    # Every row starts with a cold date cache.
+    profile_parser._normalize_date.cache_clear()
+    started = time.perf_counter()
+    parsed = parse(payloads)
+    elapsed = time.perf_counter() - started
+    print(f"  {name:<28} {parsed / elapsed:12.0f} records/s  ({elapsed:.2f}s)")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--processes", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    payloads = list(make_payloads(args.records))
+    print(f"{len(payloads)} records")
+
+    run("original parser (baseline)", parse_original, payloads)
+    run("parse_profiles", lambda items: sum(1 for _ in parse_profiles(items)), payloads)
+    run("parse_profiles trusted", lambda items: sum(1 for _ in parse_profiles(items, trusted=True)), payloads)
+    run(
+        f"parse_profiles x{args.processes} procs",
+        lambda items: sum(1 for _ in parse_profiles(items, processes=args.processes)),
+        payloads,
+    )
+    run(
+        f"trusted x{args.processes} procs",
+        lambda items: sum(1 for _ in parse_profiles(items, trusted=True, processes=args.processes)),
+        payloads,
+    )
+
+
+if __name__ == "__main__":
+    main()
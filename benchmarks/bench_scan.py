@@ -0,0 +1,236 @@
+"""
+End-to-end scan benchmark: scanner_task -> ScannerService.boot -> UpworkScraper.start_searching,
+run offline against a local fake Upwork server and a stub WebDriver.
+
+Reports per-stage latency, throughput at N concurrent workers and memory per scan, for a
+cold run (every account logs in) and a warm run (cached sessions and ciphertexts).
+
+Usage: python -m benchmarks.bench_scan [--scans N] [--workers N] [--latency S]
+           [--session-latency S] [--transport browser|http] [--storage jsonl|sqlite|json]
+           [--driver stub|remote]
+
+``--driver remote`` uses real sessions from SELENIUM_HUB_URL against the fake server,
+which must then be reachable from the grid nodes (see ``--host``).
+"""
+import argparse
+import functools
+import inspect
+import json
+import resource
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from app import create_app
+from app.services.scanners import driver_pool as driver_pool_module
+from app.services.scanners.driver_pool import DriverPool, set_driver_pool
+from app.services.scanners.service import ScannerService
+from app.services.scanners.upwork import scraper as scraper_module
+from app.services.scanners.upwork.scraper import UpworkScraper
+from app.views.scanner.tasks import scanner_task
+from benchmarks.fake_upwork import HOST, LOGIN_PATH, FakeUpworkServer
+from benchmarks.stub_webdriver import StubWebDriver
+from settings import Config
+
+
+class StageTimer:
+    """
+    Wall-clock durations of the instrumented stages, collected across worker threads.
+    """
+
+    def __init__(self) -> None:
+        self._durations: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._durations.setdefault(stage, []).append(seconds)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._durations = {}
+
+    def wrap(self, stage: str, func: Callable) -> Callable:
+        @functools.wraps(func)
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - started)
+        return timed
+
+    def patch(self, owner: Any, name: str, stage: str) -> None:
+        """
+        Replace ``owner.name`` with a timed wrapper, keeping static methods static.
+        """
+        timed = self.wrap(stage, getattr(owner, name))
+        if isinstance(inspect.getattr_static(owner, name), staticmethod):
+            setattr(owner, name, staticmethod(timed))
+        else:
+            setattr(owner, name, timed)
+
+    def report(self) -> None:
+        with self._lock:
+            durations = dict(self._durations)
+        print(f"    {'stage':<18} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'total s':>9}")
+        for stage, values in durations.items():
+            print(
+                f"    {stage:<18} {len(values):>6} {percentile(values, 50) * 1000:>9.1f}"
+                f" {percentile(values, 95) * 1000:>9.1f} {sum(values):>9.2f}"
+            )
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(pct) - 1]
+
+
+def instrument(timer: StageTimer) -> None:
+    """
+    Patch the scan pipeline so each stage reports its duration.
+    """
+    timer.patch(DriverPool, "acquire", "driver_acquire")
+    timer.patch(UpworkScraper, "_restore_session", "restore_session")
+    timer.patch(UpworkScraper, "_password_login", "login")
+    timer.patch(UpworkScraper, "_get_ciphertext", "ciphertext")
+    timer.patch(UpworkScraper, "_get_profile_details", "profile_details")
+    timer.patch(scraper_module, "parse_profile", "parse")
+    timer.patch(ScannerService, "_save", "repository_save")
+    timer.patch(ScannerService, "boot", "scan")
+
+
+def write_scanner_settings(directory: Path, base_url: str, args: argparse.Namespace) -> None:
+    accounts = {
+        f"bench{i}": {"username": f"bench{i}@example.com", "password": "secret"}
+        for i in range(args.scans)
+    }
+    settings = {
+        "upwork": {
+            "base_url": base_url,
+            "url": f"{base_url}{LOGIN_PATH}",
+            "username": "bench@example.com",
+            "password": "secret",
+            "transport": args.transport,
+            "accounts": accounts,
+        }
+    }
+    (directory / "upwork.json").write_text(json.dumps(settings))
+
+
+def make_config(work_directory: Path, settings_directory: Path, args: argparse.Namespace) -> Config:
+    config = Config()
+    config.CELERY_BROKER_URL = "memory://"
+    config.CELERY_RESULT_BACKEND = "cache+memory://"
+    config.SCANNER_SETTINGS = str(settings_directory)
+    config.CACHE_DIRECTORY = str(work_directory / "cache")
+    config.STORAGE_TYPE = args.storage
+    config.SQLITE_PATH = str(work_directory / "scanner.db")
+    config.DRIVER_POOL_SIZE = args.workers
+    # The shared limiter paces requests towards the real Upwork; off unless asked for.
+    config.RATE_LIMIT_ENABLED = args.rate_limit
+    return config
+
+
+def run_scans(app: Any, accounts: List[str], workers: int) -> List[Any]:
+    def scan(account: str) -> Any:
+        with app.app_context():
+            return scanner_task.apply(kwargs={"scanner_name": "upwork", "account": account})
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(scan, accounts))
+
+
+def run_phase(name: str, app: Any, accounts: List[str], args: argparse.Namespace, timer: StageTimer) -> None:
+    timer.reset()
+    started = time.perf_counter()
+    results = run_scans(app, accounts, args.workers)
+    elapsed = time.perf_counter() - started
+
+    failed = [result for result in results if not result.successful()]
+    print(f"  {name}: {len(accounts)} scans, {args.workers} workers")
+    print(f"    throughput {len(accounts) / elapsed:.1f} scans/s ({elapsed:.2f}s, {len(failed)} failed)")
+    if failed:
+        print(f"    first failure: {failed[0].result!r}")
+    timer.report()
+
+
+def measure_memory(app: Any, accounts: List[str]) -> None:
+    """
+    Peak Python allocations of a single scan, scans run one at a time.
+    """
+    peaks: List[float] = []
+    tracemalloc.start()
+    for account in accounts:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        run_scans(app, [account], workers=1)
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+
+    max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"  memory: {len(accounts)} sequential scans")
+    print(
+        f"    peak allocations per scan p50 {percentile(peaks, 50) / 1024:.0f} KiB,"
+        f" max {max(peaks) / 1024:.0f} KiB; process max RSS {max_rss_mb:.0f} MiB"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scans", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.02, help="Fake server latency per request (s)")
+    parser.add_argument("--session-latency", type=float, default=0.5, help="Stub WebDriver start-up time (s)")
+    parser.add_argument("--transport", choices=("browser", "http"), default="browser")
+    parser.add_argument("--storage", choices=("jsonl", "sqlite", "json"), default="jsonl")
+    parser.add_argument("--driver", choices=("stub", "remote"), default="stub")
+    parser.add_argument("--host", default=None, help="Host the grid nodes use to reach the fake server")
+    parser.add_argument("--memory-scans", type=int, default=20)
+    parser.add_argument("--rate-limit", action="store_true", help="Keep the outbound rate limiter on")
+    args = parser.parse_args(argv)
+
+    server = FakeUpworkServer(latency=args.latency).start()
+    base_url = server.base_url
+    if args.host:
+        base_url = base_url.replace(HOST, args.host)
+
+    with tempfile.TemporaryDirectory(prefix="bench_scan_") as work_directory:
+        settings_directory = Path(work_directory) / "scanner_settings"
+        settings_directory.mkdir()
+        write_scanner_settings(settings_directory, base_url, args)
+        config = make_config(Path(work_directory), settings_directory, args)
+        app = create_app(config)
+
+        factory: Callable[[], Any]
+        if args.driver == "stub":
+            factory = functools.partial(StubWebDriver, session_start_latency=args.session_latency)
+        else:
+            factory = driver_pool_module.get_remote_webdriver
+        set_driver_pool(DriverPool(factory=factory, max_size=args.workers))
+
+        timer = StageTimer()
+        instrument(timer)
+
+        accounts = [f"bench{i}" for i in range(args.scans)]
+        print(f"driver={args.driver} transport={args.transport} storage={args.storage} latency={args.latency}s")
+        run_phase("cold (password login)", app, accounts, args, timer)
+        run_phase("warm (cached session and ciphertext)", app, accounts, args, timer)
+        measure_memory(app, accounts[:args.memory_scans])
+
+        with app.app_context():
+            print(f"  driver pool: {driver_pool_module.get_driver_pool().stats()}")
+            driver_pool_module.get_driver_pool().close()
+        print(f"  fake server requests: {server.requests}")
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Local stand-in for the Upwork endpoints used by the scraper, replaying the saved
+fixtures with a configurable latency.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional
+from uuid import uuid4
+
+FIXTURES_DIRECTORY = Path(__file__).parent / "fixtures"
+
+HOST = "127.0.0.1"
+LOGIN_PATH = "/ab/account-security/login"
+AUTH_COOKIE = "master_access_token"
+
+
+class FakeUpworkServer:
+    """
+    Serves the home page (visitor cookies), the password login (auth cookie), the best
+    matches page (auth cookie required) and the profile details.
+
+    :param latency: Seconds added to every response, or per path prefix.
+    """
+
+    def __init__(self, latency: float = 0.0, route_latency: Optional[Dict[str, float]] = None) -> None:
+        self.latency = latency
+        self.route_latency = route_latency or {}
+        self.best_matches_html = (FIXTURES_DIRECTORY / "best_matches.html").read_bytes()
+        self.profile_details = json.loads((FIXTURES_DIRECTORY / "profile_details.json").read_text())
+        self.requests: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self._server = ThreadingHTTPServer((HOST, 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{HOST}:{self._server.server_port}"
+
+    def start(self) -> "FakeUpworkServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def count(self, route: str) -> None:
+        with self._lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+
+    def delay(self, path: str) -> None:
+        latency = self.latency
+        for prefix, route_latency in self.route_latency.items():
+            if path.startswith(prefix):
+                latency = route_latency
+        if latency:
+            time.sleep(latency)
+
+    def _handler_class(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format: str, *args: object) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                server.delay(self.path)
+                path = self.path.split("?")[0]
+
+                if path == "/":
+                    server.count("home")
+                    self._send(
+                        200,
+                        b"<html><body>Upwork</body></html>",
+                        "text/html",
+                        cookies={
+                            "XSRF-TOKEN": uuid4().hex,
+                            "visitor_gql_token": uuid4().hex,
+                            "forterToken": uuid4().hex,
+                        },
+                    )
+                elif path == "/robots.txt":
+                    server.count("robots")
+                    self._send(200, b"User-agent: *\n", "text/plain")
+                elif path == "/nx/find-work/best-matches":
+                    server.count("best_matches")
+                    if AUTH_COOKIE not in self.headers.get("Cookie", ""):
+                        self._send(401, b"<html>Log in</html>", "text/html")
+                    else:
+                        self._send(200, server.best_matches_html, "text/html")
+                elif path.startswith("/freelancers/api/v1/freelancer/profile/"):
+                    server.count("profile_details")
+                    self._send(200, json.dumps(server.profile_details).encode(), "application/json")
+                else:
+                    self._send(404, b"Not found", "text/plain")
+
+            def do_POST(self) -> None:
+                server.delay(self.path)
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+                if self.path == LOGIN_PATH:
+                    server.count("login")
+                    self._send(
+                        200,
+                        b'{"success": 1}',
+                        "application/json",
+                        cookies={AUTH_COOKIE: uuid4().hex},
+                    )
+                else:
+                    self._send(404, b"Not found", "text/plain")
+
+            def _send(
+                    self, status: int, body: bytes, content_type: str, cookies: Optional[Dict[str, str]] = None
+            ) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (cookies or {}).items():
+                    self.send_header("Set-Cookie", f"{name}={value}; Path=/")
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
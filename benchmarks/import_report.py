@@ -0,0 +1,81 @@
+"""
+Import time and resident memory of a process that imports the given module, e.g.
+the web app, plus the slowest imports and any heavy scanner dependency it loaded.
+
+Usage: python -m benchmarks.import_report [--module run] [--top N] [--forbid selenium,bs4,...]
+
+Exits with status 1 when a forbidden module was imported, so it can guard the web
+process in CI.
+"""
+import argparse
+import json
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+# Dependencies of the scanner stack that only the Celery worker needs.
+HEAVY_MODULES = ("selenium", "bs4", "pydantic", "app.services.scanners.upwork")
+
+_PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+# ru_maxrss is in KiB on Linux and in bytes on macOS.
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+rss_mib = rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+print(json.dumps({{"seconds": elapsed, "rss_mib": rss_mib, "modules": sorted(sys.modules)}}))
+"""
+
+
+def parse_importtime(stderr: str) -> List[Tuple[int, int, str]]:
+    """
+    :return: ``(self us, cumulative us, module)`` of each line of ``-X importtime``.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, module = (part.strip() for part in line[len("import time:"):].split("|", 2))
+        imports.append((int(own), int(cumulative), module.strip()))
+    return imports
+
+
+def probe(module: str) -> Tuple[Dict, List[Tuple[int, int, str]]]:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module)],
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise SystemExit(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1]), parse_importtime(completed.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default="run", help="Module to import (default: the web app, run)")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--forbid", default="", help="Comma-separated modules that must not be imported")
+    args = parser.parse_args(argv)
+
+    report, imports = probe(args.module)
+    print(f"import {args.module}: {report['seconds'] * 1000:.0f} ms, max RSS {report['rss_mib']:.1f} MiB, "
+          f"{len(report['modules'])} modules")
+
+    print("\nslowest imports (cumulative):")
+    for own, cumulative, module in sorted(imports, key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:9.1f} ms  {own / 1000:8.1f} ms self  {module}")
+
+    loaded = set(report["modules"])
+    heavy = [name for name in HEAVY_MODULES if name in loaded]
+    print(f"\nscanner dependencies loaded: {', '.join(heavy) or 'none'}")
+
+    forbidden = [name for name in filter(None, (part.strip() for part in args.forbid.split(","))) if name in loaded]
+    if forbidden:
+        print(f"forbidden modules imported: {', '.join(forbidden)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+WebDriver stand-in that serves the scraper's navigation and in-page fetches with
+``requests``, so scans can run without a Selenium grid.
+"""
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+import requests
+
+
+class StubWebDriver:
+    """
+    Implements the subset of the Remote WebDriver API used by the driver pool and the
+    Upwork scraper. The browser's cookie jar is a ``requests.Session``.
+
+    :param session_start_latency: Seconds spent "starting" the session, standing in for
+        the hub handshake and browser start.
+    """
+
+    user_agent = "Mozilla/5.0 (StubWebDriver)"
+
+    def __init__(self, session_start_latency: float = 0.0) -> None:
+        if session_start_latency:
+            time.sleep(session_start_latency)
+        self.session_id = uuid4().hex
+        self.current_url = "about:blank"
+        self._session = requests.Session()
+        self._session.headers["user-agent"] = self.user_agent
+
+    def get(self, url: str) -> None:
+        if url != "about:blank":
+            self._session.get(url)
+        self.current_url = url
+
+    def get_cookies(self) -> List[Dict[str, Any]]:
+        return [
+            {"name": cookie.name, "value": cookie.value, "domain": cookie.domain, "path": cookie.path}
+            for cookie in self._session.cookies
+        ]
+
+    def add_cookie(self, cookie: Dict[str, Any]) -> None:
+        self._session.cookies.set(
+            cookie["name"], cookie["value"], domain=cookie.get("domain", ""), path=cookie.get("path", "/")
+        )
+
+    def delete_all_cookies(self) -> None:
+        self._session.cookies.clear()
+
+    def execute_script(self, script: str, *args: Any) -> Any:
+        if "navigator.userAgent" in script:
+            return self.user_agent
+        if script.strip() == "return 1;":
+            return 1
+        return None
+
+    def execute_async_script(self, script: str, specs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if len(specs) == 1:
+            return [self._fetch(specs[0])]
+        with ThreadPoolExecutor(max_workers=len(specs)) as executor:
+            return list(executor.map(self._fetch, specs))
+
+    def quit(self) -> None:
+        self._session.close()
+
+    def _fetch(self, spec: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            response = self._session.request(
+                spec.get("method", "GET"),
+                spec["url"],
+                headers=spec["headers"],
+                data=spec.get("body"),
+                timeout=spec["timeout"] / 1000,
+            )
+        except requests.Timeout:
+            return {"status": None, "body": None, "error": f"Timed out after {spec['timeout']}ms"}
+        except requests.RequestException as err:
+            return {"status": None, "body": None, "error": str(err)}
+
+        content_type = response.headers.get("content-type", "")
+        is_json = "application/json" in content_type
+        body: Optional[Any] = json.loads(response.text) if is_json else response.text
+        error = None
+        if spec.get("expectJson") and not is_json:
+            error = f"Expected JSON, got [{content_type}]"
+        return {"status": response.status_code, "body": body, "error": error}
@@ -1,9 +1,25 @@
 import os
+from typing import Any
+
 from dotenv import load_dotenv
 
 load_dotenv()
 
 bind = f'0.0.0.0:{os.getenv("FLASK_PORT")}'
 workers = 1
+# Status streams hold a connection each, so requests are served by threads.
+worker_class = 'gthread'
+threads = int(os.getenv("GUNICORN_THREADS", "32"))
 accesslog = '-'
 loglevel = 'debug'
+
+
+def on_starting(server: Any) -> None:
+    # Imported by the hooks, once load_dotenv has set PROMETHEUS_MULTIPROC_DIR.
+    from app.services.metrics import clear_process_metrics
+    clear_process_metrics()
+
+
+def child_exit(server: Any, worker: Any) -> None:
+    from app.services.metrics import mark_process_dead
+    mark_process_dead(worker.pid)
@@ -1,7 +1,8 @@
 import os
-from typing import Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from dotenv import load_dotenv
+from kombu import Queue
 
 load_dotenv()
 
@@ -15,6 +16,37 @@ class Config:
     # Celery Config
     CELERY_BROKER_URL: Optional[str] = os.getenv('CELERY_BROKER_URL')
     CELERY_RESULT_BACKEND: Optional[str] = os.getenv('CELERY_RESULT_BACKEND')
+    # Publish STARTED so status streams see a task being picked up.
+    CELERY_TRACK_STARTED: bool = True
+    # 'json', or 'msgpack-zstd' for compact binary results
+    CELERY_RESULT_SERIALIZER: str = os.getenv('CELERY_RESULT_SERIALIZER', 'json')
+    CELERY_ACCEPT_CONTENT: List[str] = list(dict.fromkeys(['json', CELERY_RESULT_SERIALIZER]))
+    CELERY_TASK_RESULT_EXPIRES: int = int(os.getenv('RESULT_TTL', '86400'))
+    RESULT_COMPRESSION_LEVEL: int = int(os.getenv('RESULT_COMPRESSION_LEVEL', '3'))
+    # One queue per scan class (interactive, bulk, scheduled), each with its own workers
+    CELERY_QUEUES: Tuple[Queue, ...] = (Queue('interactive'), Queue('bulk'), Queue('scheduled'))
+    CELERY_DEFAULT_QUEUE: str = 'interactive'
+    # Scans hold a browser for minutes: reserve one message at a time, and acknowledge it
+    # only when done so a lost worker's scan is redelivered instead of dropped.
+    CELERYD_PREFETCH_MULTIPLIER: int = int(os.getenv('CELERYD_PREFETCH_MULTIPLIER', '1'))
+    CELERY_ACKS_LATE: bool = os.getenv('CELERY_ACKS_LATE', 'true').lower() == 'true'
+    # Requeue the scan of a worker process that was killed mid-task (OOM, SIGKILL) instead of
+    # failing it, so a batch lane waiting on it carries on
+    CELERY_REJECT_ON_WORKER_LOST: bool = os.getenv('CELERY_REJECT_ON_WORKER_LOST', 'true').lower() == 'true'
+    CELERYBEAT_SCHEDULE: Dict[str, Dict[str, Any]] = {
+        'rescan-due-accounts': {
+            'task': 'app.views.scanner.tasks.rescan_due_accounts',
+            'schedule': float(os.getenv('RESCAN_TICK', '60')),
+            'options': {'queue': 'scheduled'},
+        },
+        'reap-orphaned-sessions': {
+            'task': 'app.views.scanner.tasks.reap_orphaned_sessions',
+            'schedule': float(os.getenv('SESSION_REAPER_INTERVAL', '60')),
+            'options': {'queue': 'scheduled'},
+        },
+    }
+    # Replace a worker process once its resident memory passes WORKER_MAX_RSS_MB (in KiB)
+    CELERYD_MAX_MEMORY_PER_CHILD: Optional[int] = int(os.getenv('WORKER_MAX_RSS_MB', '1024')) * 1024 or None
 
     # Session and Cookie Config
     SESSION_COOKIE_HTTPONLY: bool = True
@@ -26,9 +58,88 @@ class Config:
 
     # Path to credentials JSON file
     SCANNER_SETTINGS: Optional[str] = os.getenv('SCANNER_SETTINGS')
+    # Extra scanners as name=module:Class, comma-separated
+    SCANNER_PLUGINS: Optional[str] = os.getenv('SCANNER_PLUGINS')
     STORAGE_TYPE: Optional[str] = os.getenv('STORAGE_TYPE')
+    SQLITE_PATH: Optional[str] = os.getenv('SQLITE_PATH')
+    SQLITE_INDEXES: str = os.getenv('SQLITE_INDEXES', 'account,address.country')
     FLASK_PORT: Optional[str] = os.getenv('FLASK_PORT')
     SELENIUM_HUB_URL: Optional[str] = os.getenv('SELENIUM_HUB_URL')
+    BROWSER_SCRIPT_TIMEOUT: int = int(os.getenv('BROWSER_SCRIPT_TIMEOUT', '60'))
+    BROWSER: str = os.getenv('BROWSER', 'firefox')
+    BROWSER_HEADLESS: bool = os.getenv('BROWSER_HEADLESS', 'true').lower() == 'true'
+    BROWSER_PAGE_LOAD_STRATEGY: str = os.getenv('BROWSER_PAGE_LOAD_STRATEGY', 'eager')
+    BROWSER_PAGE_LOAD_TIMEOUT: int = int(os.getenv('BROWSER_PAGE_LOAD_TIMEOUT', '60'))
+    BROWSER_BLOCK_RESOURCES: bool = os.getenv('BROWSER_BLOCK_RESOURCES', 'true').lower() == 'true'
+
+    # Batch scans
+    SCANNER_BATCH_MAX_SIZE: int = int(os.getenv('SCANNER_BATCH_MAX_SIZE', '1000'))
+    SCANNER_BATCH_CONCURRENCY: int = int(os.getenv('SCANNER_BATCH_CONCURRENCY', '8'))
+
+    # Task status streams (Server-Sent Events)
+    STATUS_STREAM_HEARTBEAT: int = int(os.getenv('STATUS_STREAM_HEARTBEAT', '15'))
+    STATUS_STREAM_TIMEOUT: int = int(os.getenv('STATUS_STREAM_TIMEOUT', '300'))
+    # Streams open at once per API process, below GUNICORN_THREADS so other requests still get a thread
+    STATUS_STREAM_MAX: int = int(os.getenv('STATUS_STREAM_MAX', '16'))
+
+    # Warm WebDriver session pool (per worker process)
+    DRIVER_POOL_SIZE: int = int(os.getenv('DRIVER_POOL_SIZE', '2'))
+    DRIVER_POOL_MAX_USES: int = int(os.getenv('DRIVER_POOL_MAX_USES', '50'))
+    DRIVER_POOL_MAX_AGE: int = int(os.getenv('DRIVER_POOL_MAX_AGE', '1800'))
+    DRIVER_POOL_ACQUIRE_TIMEOUT: int = int(os.getenv('DRIVER_POOL_ACQUIRE_TIMEOUT', '120'))
+
+    # Orphaned WebDriver session reaper and worker resource watchdog
+    SESSION_REAPER_ENABLED: bool = os.getenv('SESSION_REAPER_ENABLED', 'false').lower() == 'true'
+    SESSION_OWNER_TTL: int = int(os.getenv('SESSION_OWNER_TTL', '120'))
+    WORKER_MAX_RSS_MB: int = int(os.getenv('WORKER_MAX_RSS_MB', '1024'))
+    WORKER_MAX_SESSIONS: int = int(os.getenv('WORKER_MAX_SESSIONS', '0'))
+
+    # Grid admission control: sessions start only when the grid has a free slot
+    # (GRID_CAPACITY, or the slots reported by the hub when it is 0)
+    REDIS_URL: Optional[str] = os.getenv('REDIS_URL')
+    GRID_ADMISSION_ENABLED: bool = os.getenv('GRID_ADMISSION_ENABLED', 'false').lower() == 'true'
+    GRID_CAPACITY: int = int(os.getenv('GRID_CAPACITY', '0'))
+    GRID_CAPACITY_REFRESH: int = int(os.getenv('GRID_CAPACITY_REFRESH', '30'))
+    GRID_LEASE_TTL: int = int(os.getenv('GRID_LEASE_TTL', '2100'))
+    GRID_MAX_QUEUE: int = int(os.getenv('GRID_MAX_QUEUE', '1000'))
+
+    # Outbound request rate limits shared by every worker, per host and endpoint class:
+    # "<endpoint>=<requests per second>:<burst>,..."
+    RATE_LIMIT_ENABLED: bool = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_BACKEND: str = os.getenv('RATE_LIMIT_BACKEND', 'auto')
+    RATE_LIMITS: str = os.getenv(
+        'RATE_LIMITS', 'login=0.5:2,best_matches=2:5,profile_details=5:10,default=5:10'
+    )
+    RATE_LIMIT_MAX_WAIT: int = int(os.getenv('RATE_LIMIT_MAX_WAIT', '60'))
+
+    # Coalescing of concurrent or repeated scans of the same account
+    SCAN_COALESCING_ENABLED: bool = os.getenv('SCAN_COALESCING_ENABLED', 'false').lower() == 'true'
+    SCAN_RESULT_FRESHNESS: int = int(os.getenv('SCAN_RESULT_FRESHNESS', '300'))
+    SCAN_COALESCING_TTL: int = int(os.getenv('SCAN_COALESCING_TTL', '3600'))
+    SCAN_COALESCING_WAIT: int = int(os.getenv('SCAN_COALESCING_WAIT', '300'))
+    IDEMPOTENCY_KEY_TTL: int = int(os.getenv('IDEMPOTENCY_KEY_TTL', '86400'))
+
+    # Periodic re-scans of every configured account (Celery beat)
+    RESCAN_ENABLED: bool = os.getenv('RESCAN_ENABLED', 'false').lower() == 'true'
+    RESCAN_TICK: int = int(os.getenv('RESCAN_TICK', '60'))
+    RESCAN_INTERVAL: int = int(os.getenv('RESCAN_INTERVAL', '86400'))
+    RESCAN_MIN_INTERVAL: int = int(os.getenv('RESCAN_MIN_INTERVAL', '21600'))
+    RESCAN_MAX_INTERVAL: int = int(os.getenv('RESCAN_MAX_INTERVAL', '604800'))
+    RESCAN_MAX_PER_TICK: int = int(os.getenv('RESCAN_MAX_PER_TICK', '50'))
+
+    # Worker-side caches (login sessions, ...), shared by workers on the same volume
+    CACHE_DIRECTORY: Optional[str] = os.getenv('CACHE_DIRECTORY')
+    SESSION_CACHE_TTL: int = int(os.getenv('SESSION_CACHE_TTL', '3600'))
+    SESSION_CACHE_MAX_ENTRIES: int = int(os.getenv('SESSION_CACHE_MAX_ENTRIES', '1000'))
+    CIPHERTEXT_CACHE_TTL: int = int(os.getenv('CIPHERTEXT_CACHE_TTL', str(30 * 86400)))
+    CIPHERTEXT_CACHE_MAX_ENTRIES: int = int(os.getenv('CIPHERTEXT_CACHE_MAX_ENTRIES', '100000'))
+    SCAN_STATE_TTL: int = int(os.getenv('SCAN_STATE_TTL', str(90 * 86400)))
+    SCAN_STATE_MAX_ENTRIES: int = int(os.getenv('SCAN_STATE_MAX_ENTRIES', '100000'))
+    # Intermediate results of a scan, kept so a retried task resumes where it failed:
+    # 'auto' (Redis when the broker is Redis), 'redis' or 'file' (CACHE_DIRECTORY)
+    CHECKPOINT_BACKEND: str = os.getenv('CHECKPOINT_BACKEND', 'auto')
+    CHECKPOINT_TTL: int = int(os.getenv('CHECKPOINT_TTL', '900'))
+    CHECKPOINT_MAX_ENTRIES: int = int(os.getenv('CHECKPOINT_MAX_ENTRIES', '10000'))
 
 
 class ProductionConfig(Config):